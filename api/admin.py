@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Report, ReportData
+from django.db.models import Q
+from .models import CustomUser, Job, Report, ReportData
+from .search import search_report_data, search_terms
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
@@ -60,7 +62,7 @@ class ReportDataAdmin(admin.ModelAdmin):
         'entry_number', 'customer_name', 'customer_phone', 'location',
         'service_type', 'priority', 'status', 'is_active', 'created_at'
     ]
-    list_filter = ['service_type', 'priority', 'status', 'is_active', 'created_at']
+    list_filter = ['county', 'service_type', 'priority', 'status', 'is_active', 'created_at']
     search_fields = ['entry_number', 'customer_name', 'customer_phone', 'location']
     readonly_fields = ['entry_number', 'is_active', 'created_at', 'updated_at']
     date_hierarchy = 'created_at'
@@ -83,4 +85,23 @@ class ReportDataAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
-        return queryset.select_related('report')
\ No newline at end of file
+        return queryset.select_related('report')
+
+    def get_search_results(self, request, queryset, search_term):
+        """Look rows up through the full-text index rather than LIKE scans"""
+        terms = search_terms(search_term)
+        if terms is None:
+            return super().get_search_results(request, queryset, search_term)
+        matches = search_report_data(ReportData.objects.using(queryset.db), terms).values('id')
+        return queryset.filter(Q(entry_number=search_term.strip()) | Q(id__in=matches)), False
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress', 'created_by', 'worker', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status', 'created_at']
+    readonly_fields = [
+        'progress', 'message', 'result', 'result_file', 'error',
+        'worker', 'created_at', 'started_at', 'finished_at'
+    ]
+    date_hierarchy = 'created_at'
+
@@ -0,0 +1,82 @@
+from itertools import islice
+
+import pandas as pd
+from django.utils import timezone
+
+from .models import ReportData
+
+DIMENSIONS = ('status', 'service_type', 'priority')
+DIMENSION_CHOICES = {
+    'status': [value for value, _ in ReportData.STATUS_CHOICES],
+    'service_type': [value for value, _ in ReportData._meta.get_field('service_type').choices],
+    'priority': [value for value, _ in ReportData._meta.get_field('priority').choices],
+}
+INTERVALS = ('day', 'week')
+ANALYTICS_CHUNK_SIZE = 50000
+
+
+def _chunks(rows, size):
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _periods(created_at, interval):
+    local = created_at.dt.tz_convert(timezone.get_current_timezone_name()).dt.tz_localize(None)
+    if interval == 'week':
+        # Weeks run Monday to Sunday and are labelled by their Monday
+        return local.dt.to_period('W').dt.start_time
+    return local.dt.floor('D')
+
+
+def report_data_trends(queryset, interval='day', chunk_size=ANALYTICS_CHUNK_SIZE):
+    """Per-county completion funnel, active rates and mixes for each day or week.
+
+    Rows are read in chunks of ``chunk_size`` and each chunk is reduced to
+    group counts with vectorized pandas groupbys, so memory is bounded by the
+    chunk and the number of buckets rather than by the number of rows.
+    """
+    rows = queryset.order_by().values_list('county', 'created_at', *DIMENSIONS).iterator(
+        chunk_size=min(chunk_size, 2000)
+    )
+    partials = {dimension: [] for dimension in DIMENSIONS}
+    for chunk in _chunks(rows, chunk_size):
+        frame = pd.DataFrame.from_records(chunk, columns=['county', 'created_at', *DIMENSIONS])
+        frame['created_at'] = pd.to_datetime(frame['created_at'], utc=True)
+        frame['period'] = _periods(frame['created_at'], interval)
+        for dimension in DIMENSIONS:
+            partials[dimension].append(frame.groupby(['county', 'period', dimension], sort=False).size())
+
+    if not partials['status']:
+        return []
+
+    counts = {}
+    for dimension, parts in partials.items():
+        combined = pd.concat(parts).groupby(level=[0, 1, 2]).sum().unstack(fill_value=0)
+        counts[dimension] = combined.reindex(columns=DIMENSION_CHOICES[dimension], fill_value=0)
+    index = counts['status'].index
+    for dimension in DIMENSIONS:
+        counts[dimension] = counts[dimension].reindex(index=index, fill_value=0)
+
+    status = counts['status']
+    total = status.sum(axis=1)
+    active_rate = (status[list(ReportData.ACTIVE_STATUSES)].sum(axis=1) / total * 100).round(2)
+    completion_rate = (status['completed'] / total * 100).round(2)
+
+    # Only the (small) set of buckets is walked in Python, never the rows
+    matrices = {dimension: counts[dimension].to_numpy().tolist() for dimension in DIMENSIONS}
+    results = []
+    for position, (county, period) in enumerate(index):
+        bucket = {
+            'county': county,
+            'period': period.date().isoformat(),
+            'total': int(total.iat[position]),
+            'active_rate': float(active_rate.iat[position]),
+            'completion_rate': float(completion_rate.iat[position]),
+        }
+        for dimension in DIMENSIONS:
+            bucket[dimension] = dict(zip(DIMENSION_CHOICES[dimension], matrices[dimension][position]))
+        results.append(bucket)
+    return results
@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.core.checks import Tags, register
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .authentication import check_user_cache
+        from .sharding import check_shard_backends, seed_shard_sequences
+        from .instrumentation import install_query_recorder
+        from .search import check_search_triggers
+        post_migrate.connect(seed_shard_sequences, sender=self)
+        connection_created.connect(install_query_recorder)
+        register(check_shard_backends)
+        register(check_user_cache)
+        register(check_search_triggers, Tags.database)
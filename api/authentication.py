@@ -0,0 +1,136 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core import signing
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.core.checks import Error
+from django.utils.crypto import constant_time_compare
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+TOKEN_SALT = 'api.token'
+
+# Cache backends that keep entries inside one process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+_users = {}
+_users_lock = threading.Lock()
+
+
+def _version_key(user_id):
+    return f'api:user-version:{user_id}'
+
+
+def forget_user(user_id):
+    """Drop ``user_id`` from every process's user cache.
+
+    This process forgets it at once; the others notice the bumped version in
+    the shared cache, or at the latest when their entry expires.
+    """
+    with _users_lock:
+        _users.pop(user_id, None)
+    cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def cached_user(user_id):
+    """Return the active user ``user_id``, from this process's cache when fresh.
+
+    Entries live for USER_CACHE_SECONDS (0 turns the cache off). Callers get
+    a copy, so nothing they set on it leaks into other requests.
+    """
+    timeout = getattr(settings, 'USER_CACHE_SECONDS', 0)
+    if timeout:
+        version = cache.get(_version_key(user_id))
+        with _users_lock:
+            entry = _users.get(user_id)
+        if entry is not None and entry[1] == version and time.monotonic() - entry[2] < timeout:
+            return copy.copy(entry[0])
+
+    User = get_user_model()
+    try:
+        user = User._default_manager.get(pk=user_id)
+    except User.DoesNotExist:
+        return None
+    if not user.is_active:
+        return None
+    if timeout:
+        with _users_lock:
+            _users[user_id] = (user, version, time.monotonic())
+        return copy.copy(user)
+    return user
+
+
+def check_user_cache(app_configs, **kwargs):
+    """System check: the per-process user cache needs a cache every worker shares.
+
+    forget_user reaches other workers only through that cache; with a
+    process-local one they would keep serving a deactivated user, or an old
+    role, until their entry expires.
+    """
+    if not getattr(settings, 'USER_CACHE_SECONDS', 0):
+        return []
+    backend = settings.CACHES.get(DEFAULT_CACHE_ALIAS, {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f'USER_CACHE_SECONDS is set but the default cache ({backend}) is local to each process.',
+        hint='Use a cache shared by every worker, e.g. DJANGO_CACHE_DIR for the file-based cache.',
+        id='api.E003',
+    )]
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that resolves session users through the per-process user cache"""
+
+    def get_user(self, user_id):
+        return cached_user(user_id)
+
+
+def _password_fingerprint(user):
+    # Changing the password changes this, which revokes tokens issued before
+    return user.get_session_auth_hash()[:16]
+
+
+def issue_token(user):
+    """Return a signed, stateless API token for ``user``"""
+    return signing.dumps({'u': user.pk, 'p': _password_fingerprint(user)}, salt=TOKEN_SALT, compress=True)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """Authenticate ``Authorization: Bearer <token>`` headers without a session.
+
+    Tokens are signed with SECRET_KEY and expire after API_TOKEN_MAX_AGE
+    seconds, so checking one needs no database read beyond loading the
+    user, which comes from the per-process cache.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            payload = signing.loads(
+                auth[1].decode(), salt=TOKEN_SALT, max_age=getattr(settings, 'API_TOKEN_MAX_AGE', 3600)
+            )
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        user = cached_user(payload.get('u'))
+        if user is None or not constant_time_compare(payload.get('p', ''), _password_fingerprint(user)):
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        return user, payload
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,109 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .metrics import observe_cache
+from .routers import primary_reads
+
+DATA_VERSION_KEY = 'api:data-version'
+
+
+def get_data_version():
+    """Return the current data version, a nanosecond timestamp of the last change"""
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(DATA_VERSION_KEY, time.time_ns())
+    return version
+
+
+async def aget_data_version():
+    version = await cache.aget(DATA_VERSION_KEY)
+    if version is None:
+        await cache.aadd(DATA_VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(DATA_VERSION_KEY, time.time_ns())
+    return version
+
+
+def bump_data_version():
+    cache.set(DATA_VERSION_KEY, time.time_ns(), None)
+
+
+def invalidate_on_commit(using=None):
+    """Bump the data version once the transaction on ``using`` commits.
+
+    Bumping before the commit would let a concurrent request cache the old
+    data under the new version.
+    """
+    transaction.on_commit(bump_data_version, using=using)
+
+
+def _validators(name, version, dated):
+    """Return the (etag, last_modified) pair for a payload at ``version``"""
+    last_modified = version // 1_000_000_000 if dated else None
+    return quote_etag(hashlib.md5(f'{name}:{version}'.encode()).hexdigest()), last_modified
+
+
+def _finish(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Let clients keep the payload but revalidate it on every poll
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def cached_response(request, name, build, version=None):
+    """Serve ``build()`` from the cache under a versioned key, honouring conditional GETs.
+
+    ``version`` defaults to the data version, which is bumped whenever users,
+    reports or report data change; pass a fixed value for static payloads.
+    Misses are built from the primary: a lagging replica could otherwise
+    store old data under the new version until the next change.
+    """
+    dated = version is None
+    if dated:
+        version = get_data_version()
+    etag, last_modified = _validators(name, version, dated)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        observe_cache(name, 'not_modified')
+        return not_modified
+
+    key = f'api:{name}:{version}'
+    data = cache.get(key)
+    observe_cache(name, 'miss' if data is None else 'hit')
+    if data is None:
+        with primary_reads():
+            data = build()
+        cache.set(key, data, getattr(settings, 'API_CACHE_TIMEOUT', 300))
+    return _finish(Response(data), etag, last_modified)
+
+
+async def acached_response(request, name, build, version=None):
+    """Async counterpart of cached_response; ``build`` is a coroutine function"""
+    dated = version is None
+    if dated:
+        version = await aget_data_version()
+    etag, last_modified = _validators(name, version, dated)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        observe_cache(name, 'not_modified')
+        return not_modified
+
+    key = f'api:{name}:{version}'
+    data = await cache.aget(key)
+    observe_cache(name, 'miss' if data is None else 'hit')
+    if data is None:
+        with primary_reads():
+            data = await build()
+        await cache.aset(key, data, getattr(settings, 'API_CACHE_TIMEOUT', 300))
+    return _finish(JsonResponse(data, encoder=JSONEncoder, safe=False), etag, last_modified)
@@ -0,0 +1,69 @@
+import csv
+
+from django.utils import timezone
+from openpyxl import Workbook
+
+from .metrics import RowMeter
+
+EXPORT_FIELDS = (
+    'entry_number', 'customer_name', 'customer_phone', 'location',
+    'service_type', 'priority', 'status', 'agent_feedback',
+    'supervisor_feedback', 'created_at',
+)
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose write() hands the value straight back"""
+
+    def write(self, value):
+        return value
+
+
+def _export_rows(queryset, fields, chunk_size):
+    return queryset.order_by('id').values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def _excel_value(value):
+    # Excel cannot store timezone-aware datetimes
+    if hasattr(value, 'tzinfo') and value.tzinfo is not None:
+        return timezone.make_naive(value)
+    return value
+
+
+def iter_csv(queryset, fields=EXPORT_FIELDS, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield CSV lines for the queryset, reading it in chunks"""
+    writer = csv.writer(_Echo())
+    meter = RowMeter('export_csv', flush_every=chunk_size)
+    yield writer.writerow(fields)
+    try:
+        for row in _export_rows(queryset, fields, chunk_size):
+            meter.add()
+            yield writer.writerow(row)
+    finally:
+        meter.flush()
+
+
+def write_xlsx(queryset, fileobj, fields=EXPORT_FIELDS, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """Write the queryset to ``fileobj`` as a workbook in write-only mode.
+
+    Rows are flushed to the sheet as they are read, so memory stays bounded
+    regardless of how many rows the queryset returns. Nothing reaches
+    ``fileobj`` until the last row is in, since the sheet is zipped at the
+    end. ``progress`` is called with the number of rows written after every
+    chunk.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Report Data')
+    meter = RowMeter('export_xlsx', flush_every=chunk_size)
+    sheet.append(fields)
+    for written, row in enumerate(_export_rows(queryset, fields, chunk_size), 1):
+        sheet.append([_excel_value(value) for value in row])
+        meter.add()
+        if progress is not None and written % chunk_size == 0:
+            progress(written)
+    workbook.save(fileobj)
+    meter.flush()
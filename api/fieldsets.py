@@ -0,0 +1,98 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_sparse_fieldset(query_params):
+    """Return the (fields, omit) name sets requested with ?fields= and ?omit="""
+    def split(name):
+        value = query_params.get(name)
+        if not value:
+            return None
+        return {part.strip() for part in value.split(',') if part.strip()}
+    return split('fields'), split('omit')
+
+
+def _concrete_field_names(model):
+    return [field.name for field in model._meta.concrete_fields]
+
+
+def narrow_queryset(queryset, serializer_fields, required=()):
+    """Restrict ``queryset`` with only() to the columns the serializer reads.
+
+    Dotted sources on forward relations are narrowed too when the relation is
+    already select_related. Fields backed by properties, methods or reverse
+    relations of the model itself leave the queryset unchanged.
+    """
+    model = queryset.model
+    select_related = queryset.query.select_related
+    only = {model._meta.pk.name, *required}
+    traversed = set()
+
+    for field in serializer_fields.values():
+        if field.source == '*':
+            return queryset
+        attrs = field.source_attrs
+        try:
+            model_field = model._meta.get_field(attrs[0])
+        except FieldDoesNotExist:
+            return queryset
+        if not model_field.concrete:
+            # Nested rows may read any column of the parent, so keep it whole
+            return queryset
+        only.add(attrs[0])
+        if not model_field.is_relation or len(attrs) == 1:
+            continue
+        if select_related is not True and attrs[0] not in (select_related or {}):
+            continue
+        related_model = model_field.related_model
+        try:
+            related_field = related_model._meta.get_field(attrs[1])
+            related_names = [related_field.name] if related_field.concrete else []
+        except FieldDoesNotExist:
+            related_names = _concrete_field_names(related_model)
+        only.update(f'{attrs[0]}__{name}' for name in related_names)
+        traversed.add(attrs[0])
+
+    if select_related:
+        # Joins the fieldset no longer reads are dropped along with their columns
+        queryset = queryset.select_related(None)
+        if traversed:
+            queryset = queryset.select_related(*traversed)
+    return queryset.only(*only)
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin that lets ?fields= and ?omit= pick the returned fields.
+
+    Only applies to the top-level serializer of a read request, so writes
+    still validate every field and nested serializers keep their shape.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or not self._is_sparse_root():
+            return fields
+
+        include, omit = parse_sparse_fieldset(request.query_params)
+        if include is not None:
+            fields = {name: field for name, field in fields.items() if name in include}
+        if omit is not None:
+            fields = {name: field for name, field in fields.items() if name not in omit}
+        return fields
+
+    def _is_sparse_root(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+
+class SparseFieldsetViewMixin:
+    """Viewset mixin that narrows the ORM query to the requested fieldset"""
+    sparse_required_fields = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method in SAFE_METHODS and any(parse_sparse_fieldset(self.request.query_params)):
+            queryset = narrow_queryset(queryset, self.get_serializer().fields, self.sparse_required_fields)
+        return queryset
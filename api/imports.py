@@ -0,0 +1,151 @@
+import csv
+import io
+from itertools import islice
+
+from openpyxl import load_workbook
+from rest_framework.exceptions import ValidationError
+
+from .metrics import RowMeter
+from .models import ReportData
+from .serializers import ReportDataSerializer
+
+IMPORT_FIELDS = (
+    'customer_name', 'customer_phone', 'location', 'service_type',
+    'priority', 'status', 'agent_feedback', 'supervisor_feedback',
+)
+
+REQUIRED_IMPORT_FIELDS = ('customer_name', 'customer_phone', 'location', 'service_type', 'priority')
+
+IMPORT_FORMATS = ('xlsx', 'csv')
+
+IMPORT_CHUNK_SIZE = 500
+
+# Rows past this many errors are still counted but their details are dropped
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFileError(ValueError):
+    """The uploaded file cannot be read as report data"""
+
+
+def import_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension not in IMPORT_FORMATS:
+        raise ImportFileError('Upload a .xlsx or .csv file')
+    return extension
+
+
+def _column_name(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def _cell_value(value):
+    if value is None:
+        return ''
+    # Spreadsheets store phone numbers and the like as floats
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+class SpreadsheetReader:
+    """Read report data rows from an .xlsx or CSV file one row at a time.
+
+    Workbooks are opened in read-only mode and CSV is decoded as it is
+    read, so memory stays flat however many rows the file has. ``total`` is
+    the number of data rows when the format records it, otherwise None.
+    """
+
+    def __init__(self, fileobj, file_format):
+        self.total = None
+        if file_format == 'xlsx':
+            try:
+                workbook = load_workbook(fileobj, read_only=True, data_only=True)
+            except Exception as exc:
+                raise ImportFileError(f'Could not read the workbook: {exc}')
+            sheet = workbook.worksheets[0]
+            if sheet.max_row:
+                self.total = max(sheet.max_row - 1, 0)
+            self._rows = sheet.iter_rows(values_only=True)
+        else:
+            text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+            self._rows = csv.reader(text)
+
+        try:
+            header = next(self._rows)
+        except (StopIteration, UnicodeDecodeError, csv.Error):
+            raise ImportFileError('The file has no header row')
+        self.columns = [_column_name(value) for value in header]
+        missing = [name for name in REQUIRED_IMPORT_FIELDS if name not in self.columns]
+        if missing:
+            raise ImportFileError(f'Missing columns: {", ".join(missing)}')
+
+    def __iter__(self):
+        """Yield (row number, field dict) pairs, skipping blank rows.
+
+        Empty cells are left out, so blank optional columns take their
+        defaults. A row that cannot be decoded raises ImportFileError.
+        """
+        number = 1
+        while True:
+            number += 1
+            try:
+                values = next(self._rows)
+            except StopIteration:
+                return
+            except (UnicodeDecodeError, csv.Error) as exc:
+                raise ImportFileError(f'Row {number} could not be read: {exc}')
+            row = {}
+            for name, value in zip(self.columns, values):
+                value = _cell_value(value)
+                if name in IMPORT_FIELDS and value:
+                    row[name] = value
+            if row:
+                yield number, row
+
+
+def _read_chunk(rows, chunk_size):
+    """Return up to ``chunk_size`` rows and the error that cut the file short, if any"""
+    chunk = []
+    try:
+        for item in islice(rows, chunk_size):
+            chunk.append(item)
+    except ImportFileError as exc:
+        return chunk, str(exc)
+    return chunk, None
+
+
+def import_rows(report, rows, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """Validate and insert ``rows`` for ``report`` a chunk at a time.
+
+    Each chunk is inserted in its own transaction, so valid rows are kept
+    and invalid ones are reported by row number without holding the whole
+    file in memory. ``progress`` is called with the number of rows read
+    after every chunk. If the file turns out to be unreadable partway, the
+    rows before that point are kept and the problem is returned as
+    ``error``.
+    """
+    validator = ReportDataSerializer(context={'report': report})
+    meter = RowMeter('import', flush_every=chunk_size)
+    summary = {'rows': 0, 'created': 0, 'failed': 0, 'errors': [], 'error': None}
+    rows = iter(rows)
+    while summary['error'] is None:
+        chunk, summary['error'] = _read_chunk(rows, chunk_size)
+        if not chunk:
+            break
+        valid = []
+        for number, row in chunk:
+            try:
+                valid.append(validator.run_validation(row))
+            except ValidationError as exc:
+                summary['failed'] += 1
+                if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                    summary['errors'].append({'row': number, 'errors': exc.detail})
+        if valid:
+            summary['created'] += len(ReportData.bulk_create_for_report(report, valid))
+        summary['rows'] += len(chunk)
+        meter.add(len(chunk))
+        if progress is not None:
+            progress(summary['rows'])
+    meter.flush()
+    return summary
@@ -0,0 +1,126 @@
+from contextvars import ContextVar
+from time import perf_counter
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Timings and database work of one request, filled in as it runs"""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest_sql = None
+        self.slowest_time = 0.0
+        self.view_started = None
+        self.view_time = None
+        self.render_started = None
+        self.render_time = None
+        self.total_time = None
+        self.response_bytes = None
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        if duration >= self.slowest_time:
+            self.slowest_sql = sql
+            self.slowest_time = duration
+
+    def start_view(self):
+        self.view_started = perf_counter()
+
+    def end_view(self):
+        """Mark where the view returned and response rendering begins"""
+        if self.view_started is not None and self.view_time is None:
+            self.render_started = perf_counter()
+            self.view_time = self.render_started - self.view_started
+
+    def finish(self):
+        now = perf_counter()
+        self.total_time = now - self.started
+        if self.render_started is not None:
+            self.render_time = now - self.render_started
+        elif self.view_started is not None:
+            self.view_time = now - self.view_started
+
+
+def current_metrics():
+    """The metrics of the request being handled in this context, if any"""
+    return _current.get()
+
+
+def begin_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def metered(iterable, metrics, on_close):
+    """Iterate a streaming body with ``metrics`` active, then call ``on_close``.
+
+    The body of a streaming response is produced after the middleware has
+    returned, so its queries are only counted if each step runs with the
+    request's metrics in context. The bytes sent are added up in
+    ``metrics.response_bytes``. ``on_close`` runs when the body is
+    exhausted or the response is closed early.
+    """
+    iterator = iter(iterable)
+    metrics.response_bytes = 0
+    try:
+        while True:
+            token = _current.set(metrics)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _current.reset(token)
+            metrics.response_bytes += len(chunk)
+            yield chunk
+    finally:
+        on_close()
+
+
+async def ametered(iterable, metrics, on_close):
+    """Async counterpart of metered"""
+    iterator = aiter(iterable)
+    metrics.response_bytes = 0
+    try:
+        while True:
+            token = _current.set(metrics)
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            finally:
+                _current.reset(token)
+            metrics.response_bytes += len(chunk)
+            yield chunk
+    finally:
+        on_close()
+
+
+def record_queries(execute, sql, params, many, context):
+    """Database execute wrapper that adds each query to the current request's metrics"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, perf_counter() - started)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created handler putting record_queries on every new connection.
+
+    The request is found through a context variable, which sync_to_async
+    carries over, so queries run from async views are counted as well.
+    """
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_queries)
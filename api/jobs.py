@@ -0,0 +1,138 @@
+import io
+import logging
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connections
+
+from .exports import EXPORT_CHUNK_SIZE, iter_csv, write_xlsx
+from .imports import IMPORT_CHUNK_SIZE, ImportFileError, SpreadsheetReader, import_format, import_rows
+from .models import Job, Report, ReportData
+from .serializers import ReportDataSerializer
+from .scoping import scoped_report, scoped_report_data
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {}
+
+
+class JobError(Exception):
+    """A job failed in an expected way; ``result`` holds details for the client"""
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+def job_handler(kind):
+    """Register the decorated function as the handler for jobs of ``kind``"""
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def run_job(job_id):
+    """Run one claimed job and record its outcome.
+
+    Runs inside a worker thread or process, so it closes that worker's
+    database connections when done.
+    """
+    job = Job.objects.select_related('created_by').get(pk=job_id)
+    try:
+        result = JOB_HANDLERS[job.kind](job)
+    except JobError as exc:
+        job.fail(str(exc), exc.result)
+    except Exception as exc:
+        logger.exception('Job %s (%s) failed', job.pk, job.kind)
+        job.fail(f'{type(exc).__name__}: {exc}')
+    else:
+        job.succeed(result)
+    finally:
+        connections.close_all()
+    return job.status
+
+
+@job_handler('export')
+def export_report_data(job):
+    """Write the report data visible to the job's creator to a result file"""
+    queryset = scoped_report_data(job.created_by)
+    if job.params.get('report_id'):
+        queryset = queryset.filter(report_id=job.params['report_id'])
+    total = queryset.count()
+
+    def progress(written):
+        job.set_progress(written * 100 // max(total, 1), f'{written} of {total} rows written')
+
+    export_format = job.params.get('export_format', 'xlsx')
+    with tempfile.TemporaryFile() as result_file:
+        if export_format == 'csv':
+            for written, line in enumerate(iter_csv(queryset)):
+                result_file.write(line.encode('utf-8'))
+                if written and written % EXPORT_CHUNK_SIZE == 0:
+                    progress(written)
+        else:
+            write_xlsx(queryset, result_file, progress=progress)
+        result_file.seek(0)
+        job.result_file.save(f'report_data_{job.pk}.{export_format}', File(result_file), save=False)
+    return {'rows': total}
+
+
+def _job_report(job):
+    """The job's report, checked again against its creator's scope before anything is written"""
+    try:
+        return scoped_report(job.created_by, job.params.get('report_id'))
+    except (Report.DoesNotExist, TypeError, ValueError):
+        raise JobError('Report not found')
+
+
+@job_handler('import')
+def import_report_data(job):
+    """Validate and insert a batch of report data entries for one report"""
+    report = _job_report(job)
+    entries = job.params.get('entries', [])
+    # Validate every entry before inserting any, so bad input inserts nothing.
+    # Chunks then commit one at a time: a crash partway keeps the chunks done.
+    serializer = ReportDataSerializer(data=entries, many=True, context={'report': report})
+    if not serializer.is_valid():
+        raise JobError('Some entries are invalid', {'errors': serializer.errors})
+
+    created = 0
+    rows = serializer.validated_data
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        chunk = rows[start:start + IMPORT_CHUNK_SIZE]
+        created += len(ReportData.bulk_create_for_report(report, chunk))
+        job.set_progress(created * 100 // len(rows), f'{created} of {len(rows)} rows inserted')
+    return {'created': created}
+
+
+@job_handler('import_file')
+def import_report_data_file(job):
+    """Import an uploaded spreadsheet, keeping valid rows and reporting the rest"""
+    report = _job_report(job)
+    path = job.params['path']
+    try:
+        with default_storage.open(path, 'rb') as upload:
+            reader = SpreadsheetReader(upload, import_format(path))
+
+            def progress(read):
+                if reader.total:
+                    job.set_progress(read * 100 // reader.total, f'{read} of {reader.total} rows read')
+                else:
+                    job.set_progress(job.progress, f'{read} rows read')
+
+            return import_rows(report, reader, progress=progress)
+    except ImportFileError as exc:
+        raise JobError(str(exc))
+    finally:
+        default_storage.delete(path)
+
+
+@job_handler('rebuild_stats')
+def rebuild_report_stats(job):
+    """Recount report counters and rollups from their data rows"""
+    output = io.StringIO()
+    call_command('rebuild_report_stats', *job.params.get('report_ids', []), stdout=output)
+    return {'output': output.getvalue().strip()}
@@ -0,0 +1,49 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.provisioning import password_hash_workers, provision_users
+from api.serializers import UserProvisionSerializer
+
+
+class Command(BaseCommand):
+    help = 'Create agents and supervisors in bulk from a CSV file, hashing passwords on a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='CSV with role, county and sublocation columns, plus optional '
+                                             'username, password, first_name, last_name, email and phone_number')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processes hashing passwords (default: PASSWORD_HASH_WORKERS or one per CPU)')
+        parser.add_argument('--output', help='Write the created usernames and employee IDs to this CSV file')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as source:
+                rows = [
+                    {name.strip(): value.strip() for name, value in row.items() if name and value and value.strip()}
+                    for row in csv.DictReader(source)
+                ]
+        except OSError as exc:
+            raise CommandError(exc)
+
+        serializer = UserProvisionSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, list):
+                errors = {f'row {number}': error for number, error in enumerate(errors, start=2) if error}
+            raise CommandError(f'Invalid users: {errors}')
+
+        workers = options['workers'] or password_hash_workers()
+        started = time.monotonic()
+        users = provision_users(serializer.validated_data, workers=workers)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} users in {time.monotonic() - started:.1f}s with {workers} hashing process(es)'
+        ))
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                writer = csv.writer(output)
+                writer.writerow(['username', 'employee_id', 'role', 'county', 'sublocation'])
+                for user in users:
+                    writer.writerow([user.username, user.employee_id, user.role, user.county, user.sublocation])
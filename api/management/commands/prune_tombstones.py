@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Tombstone
+from api.sharding import data_aliases
+from api.sync import tombstone_retention
+
+
+class Command(BaseCommand):
+    help = 'Delete delta-sync tombstones older than SYNC_TOMBSTONE_DAYS'
+
+    def handle(self, *args, **options):
+        retention = tombstone_retention()
+        cutoff = timezone.now() - retention
+        deleted = sum(
+            Tombstone.objects.using(alias).filter(deleted_at__lt=cutoff).delete()[0]
+            for alias in data_aliases()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} tombstones older than {retention.days} days'
+        ))
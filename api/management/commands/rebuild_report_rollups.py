@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.models import ReportRollup
+from api.sharding import data_aliases
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the county/sublocation/status/day report rollups from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        buckets = sum(
+            ReportRollup.rebuild(batch_size=options['batch_size'], using=alias)
+            for alias in data_aliases()
+        )
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {buckets} report rollup buckets'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from api.models import Report, ReportRollup
+from api.sharding import data_aliases
+
+
+class Command(BaseCommand):
+    help = 'Recount report aggregates from their data rows to repair counter drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('report_ids', nargs='*', type=int, help='Only rebuild these reports')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rebuilt = sum(self.rebuild(alias, options) for alias in data_aliases())
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt statistics for {rebuilt} reports'))
+
+    def rebuild(self, using, options):
+        """Recount the reports stored on one database"""
+        queryset = Report.objects.using(using).annotate(
+            row_total=Count('data_rows'),
+            row_active=Count('data_rows', filter=Q(data_rows__is_active=True)),
+            row_completed=Count('data_rows', filter=Q(data_rows__status='completed')),
+        ).only('id').order_by('id')
+        if options['report_ids']:
+            queryset = queryset.filter(id__in=options['report_ids'])
+
+        fields = ['total_entries', 'active_count', 'completed_count', 'active_rate', 'completion_rate']
+        batch = []
+        rebuilt = 0
+        with transaction.atomic(using=using):
+            for report in queryset.iterator(chunk_size=options['batch_size']):
+                report.set_counters(report.row_total, report.row_active, report.row_completed)
+                batch.append(report)
+                if len(batch) >= options['batch_size']:
+                    Report.objects.using(using).bulk_update(batch, fields)
+                    rebuilt += len(batch)
+                    batch = []
+            if batch:
+                Report.objects.using(using).bulk_update(batch, fields)
+                rebuilt += len(batch)
+            # bulk_update bypasses Report.save(), so refresh the rollups as well
+            ReportRollup.rebuild(batch_size=options['batch_size'], using=using)
+        return rebuilt
@@ -0,0 +1,62 @@
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.jobs import run_job
+from api.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (exports, imports, recomputations) on a worker pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'JOB_WORKERS', 2))
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='Run jobs on threads, or on processes for CPU-heavy work')
+        parser.add_argument('--poll-interval', type=float, default=getattr(settings, 'JOB_POLL_INTERVAL', 1.0))
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        workers = max(1, options['workers'])
+        if options['pool'] == 'process':
+            # Child processes must open their own connections, not inherit ours
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+
+        self.stdout.write(f'Worker {worker} running jobs on {workers} {options["pool"]}(s)')
+        running = {}
+        # Renew leases well before they lapse, without a write on every poll
+        renew_every = Job.lease().total_seconds() / 4
+        renewed = time.monotonic()
+        with executor:
+            while True:
+                if running and time.monotonic() - renewed >= renew_every:
+                    Job.renew_leases(worker, list(running.values()))
+                    renewed = time.monotonic()
+                for future in [future for future in running if future.done()]:
+                    job_id = running.pop(future)
+                    try:
+                        self.stdout.write(f'Job {job_id} {future.result()}')
+                    except Exception as exc:
+                        self.stderr.write(f'Job {job_id} crashed the worker: {exc}')
+
+                claimed = None
+                while len(running) < workers:
+                    claimed = Job.claim(worker)
+                    if claimed is None:
+                        break
+                    self.stdout.write(f'Job {claimed.pk} ({claimed.kind}) started')
+                    running[executor.submit(run_job, claimed.pk)] = claimed.pk
+
+                if options['once'] and claimed is None and not running:
+                    break
+                time.sleep(options['poll_interval'] if claimed is None else 0.05)
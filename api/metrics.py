@@ -0,0 +1,102 @@
+import os
+from time import perf_counter
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# With PROMETHEUS_MULTIPROC_DIR set (to an empty directory shared by every
+# worker, cleared on deploy), prometheus_client keeps each process's values
+# in files there and the endpoint sums them; otherwise values are per process.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+REQUEST_LATENCY = Histogram(
+    'api_request_duration_seconds', 'Time to produce a response, by URL name',
+    ['route', 'method'], buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    'api_requests', 'Responses sent, by URL name and status code',
+    ['route', 'method', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'api_request_db_queries', 'SQL queries run per request, by URL name',
+    ['route'], buckets=QUERY_BUCKETS,
+)
+ROWS = Counter(
+    'api_rows', 'Report data rows exported or imported',
+    ['operation'],
+)
+ROW_SECONDS = Counter(
+    'api_row_seconds', 'Time spent exporting or importing rows; rows / seconds is the throughput',
+    ['operation'],
+)
+CACHE_LOOKUPS = Counter(
+    'api_cache_lookups', 'Cached API payload lookups by result (hit, miss or not_modified)',
+    ['name', 'result'],
+)
+
+
+def observe_request(route, method, status, duration, queries):
+    REQUEST_LATENCY.labels(route, method).observe(duration)
+    REQUESTS.labels(route, method, str(status)).inc()
+    REQUEST_QUERIES.labels(route).observe(queries)
+
+
+def observe_cache(name, result):
+    CACHE_LOOKUPS.labels(name, result).inc()
+
+
+class RowMeter:
+    """Count rows for an export or import and the time spent on them.
+
+    Call ``add()`` as rows are processed and ``flush()`` at the end; totals
+    are published every ``flush_every`` rows so long runs show up as they go.
+    """
+
+    def __init__(self, operation, flush_every=1000):
+        self.operation = operation
+        self.flush_every = flush_every
+        self.pending = 0
+        self.started = perf_counter()
+
+    def add(self, rows=1):
+        self.pending += rows
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        now = perf_counter()
+        if self.pending:
+            ROWS.labels(self.operation).inc(self.pending)
+        ROW_SECONDS.labels(self.operation).inc(now - self.started)
+        self.pending = 0
+        self.started = now
+
+
+def render_metrics():
+    """Return (body, content type) for the Prometheus text exposition"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def scrape_allowed(request):
+    """Whether ``request`` may read the metrics.
+
+    Scrapers send ``Authorization: Bearer <METRICS_TOKEN>``; without a
+    configured token only staff and managers signed in with a session can.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        scheme, _, given = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer' and constant_time_compare(given.strip(), token):
+            return True
+    user = request.user
+    return user.is_authenticated and (user.is_staff or user.role == 'manager')
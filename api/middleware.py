@@ -0,0 +1,149 @@
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+from .instrumentation import ametered, begin_request, end_request, metered
+from .metrics import observe_request
+from .routers import replica_configured
+
+logger = logging.getLogger('api.requests')
+
+
+class ReplicaStickinessMiddleware(MiddlewareMixin):
+    """Pin a client to the primary database for a short while after it writes.
+
+    A signed cookie marks clients that just made a successful write, so their
+    next reads see their own changes even while the replica is catching up.
+    Built on MiddlewareMixin so async views keep running on the event loop.
+    """
+    cookie_name = 'replica_pin'
+    salt = 'api.replica-pin'
+
+    def process_request(self, request):
+        request.replica_pinned = False
+        if not replica_configured():
+            return
+        sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+        try:
+            signing.loads(request.COOKIES[self.cookie_name], salt=self.salt, max_age=sticky_seconds)
+            request.replica_pinned = True
+        except (KeyError, signing.BadSignature):
+            pass
+
+    def process_response(self, request, response):
+        if replica_configured() and request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                self.cookie_name, signing.dumps(True, salt=self.salt),
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 5), httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class RequestMetricsMiddleware:
+    """Measure each request and report it in a Server-Timing header and a log line.
+
+    Records the number and total time of SQL queries, the time spent in the
+    view, the time spent rendering the response body (DRF renderers and
+    templates) and the response size. Each request is logged at DEBUG;
+    requests slower than SLOW_REQUEST_MS or running more than
+    SLOW_REQUEST_QUERIES queries are logged as warnings together with their
+    slowest SQL statement. Latency and query counts also go to the
+    Prometheus metrics. Streaming responses are logged and measured once
+    their body has been sent, so the queries run and bytes sent while
+    streaming count.
+    Works for sync and async views.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.metrics, token = begin_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, request.metrics)
+
+    async def __acall__(self, request):
+        request.metrics, token = begin_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, request.metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics.start_view()
+
+    def process_template_response(self, request, response):
+        # Called once the view has returned, just before the body is rendered
+        request.metrics.end_view()
+        return response
+
+    def finish(self, request, response, metrics):
+        metrics.finish()
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            # For streaming responses this covers the work done before the body
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={duration * 1000:.1f}' + (f';desc="{desc}"' if desc else '')
+                for name, duration, desc in self.timings(metrics) if duration is not None
+            )
+        if not response.streaming:
+            metrics.response_bytes = len(response.content)
+            self.report(request, response, metrics)
+            return response
+
+        def on_close():
+            metrics.finish()
+            self.report(request, response, metrics)
+
+        wrap = ametered if response.is_async else metered
+        response.streaming_content = wrap(response.streaming_content, metrics, on_close)
+        return response
+
+    @staticmethod
+    def timings(metrics):
+        return [
+            ('db', metrics.db_time, f'{metrics.queries} queries'),
+            ('view', metrics.view_time, None),
+            ('render', metrics.render_time, None),
+            ('total', metrics.total_time, None),
+        ]
+
+    def report(self, request, response, metrics):
+        view_name = request.resolver_match.view_name if request.resolver_match else None
+        observe_request(view_name or 'unmatched', request.method, response.status_code, metrics.total_time, metrics.queries)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'bytes': metrics.response_bytes,
+        }
+        record.update(
+            (f'{name}_ms', round(duration * 1000, 1))
+            for name, duration, _ in self.timings(metrics) if duration is not None
+        )
+        slow = (
+            metrics.total_time * 1000 > getattr(settings, 'SLOW_REQUEST_MS', 500)
+            or metrics.queries > getattr(settings, 'SLOW_REQUEST_QUERIES', 50)
+        )
+        if slow:
+            record['slowest_sql_ms'] = round(metrics.slowest_time * 1000, 1)
+            record['slowest_sql'] = metrics.slowest_sql
+            logger.warning(json.dumps(record))
+        else:
+            logger.debug(json.dumps(record))
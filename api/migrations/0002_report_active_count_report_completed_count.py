@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:43
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    Report = apps.get_model('api', 'Report')
+    for report in Report.objects.annotate(
+        active=Count('data_rows', filter=Q(data_rows__is_active=True)),
+        completed=Count('data_rows', filter=Q(data_rows__status='completed')),
+    ):
+        Report.objects.filter(pk=report.pk).update(
+            active_count=report.active,
+            completed_count=report.completed,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='active_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='completed_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    Report = apps.get_model('api', 'Report')
+    ReportData = apps.get_model('api', 'ReportData')
+    ReportEntrySequence = apps.get_model('api', 'ReportEntrySequence')
+
+    last_numbers = {report_id: 0 for report_id in Report.objects.values_list('id', flat=True)}
+    for report_id, entry_number in ReportData.objects.values_list('report_id', 'entry_number').iterator():
+        try:
+            number = int(entry_number.split('-')[-1])
+        except ValueError:
+            continue
+        last_numbers[report_id] = max(last_numbers.get(report_id, 0), number)
+
+    ReportEntrySequence.objects.bulk_create(
+        [ReportEntrySequence(report_id=report_id, last_number=number) for report_id, number in last_numbers.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_report_active_count_report_completed_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportEntrySequence',
+            fields=[
+                ('report', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='entry_sequence', serialize=False, to='api.report')),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
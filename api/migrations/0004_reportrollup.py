@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:49
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_rollups(apps, schema_editor):
+    Report = apps.get_model('api', 'Report')
+    ReportRollup = apps.get_model('api', 'ReportRollup')
+    buckets = Report.objects.annotate(day=TruncDate('created_at')).values(
+        'county', 'sublocation', 'status', 'day'
+    ).annotate(
+        report_count=Count('id'),
+        active_rate_sum=Sum('active_rate'),
+        total_entries_sum=Sum('total_entries'),
+        active_entries=Sum('active_count'),
+        completed_entries=Sum('completed_count'),
+    ).order_by()
+    ReportRollup.objects.bulk_create([
+        ReportRollup(
+            county=bucket['county'], sublocation=bucket['sublocation'],
+            status=bucket['status'], day=bucket['day'],
+            report_count=bucket['report_count'],
+            active_rate_sum=bucket['active_rate_sum'] or 0,
+            total_entries=bucket['total_entries_sum'] or 0,
+            active_entries=bucket['active_entries'] or 0,
+            completed_entries=bucket['completed_entries'] or 0,
+        )
+        for bucket in buckets
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_reportentrysequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('county', models.CharField(choices=[('nairobi', 'Nairobi'), ('mombasa', 'Mombasa'), ('kwale', 'Kwale'), ('kilifi', 'Kilifi'), ('tana_river', 'Tana River'), ('lamu', 'Lamu'), ('taita_taveta', 'Taita Taveta'), ('garissa', 'Garissa'), ('wajir', 'Wajir'), ('mandera', 'Mandera'), ('marsabit', 'Marsabit'), ('isiolo', 'Isiolo'), ('meru', 'Meru'), ('tharaka_nithi', 'Tharaka-Nithi'), ('embu', 'Embu'), ('kitui', 'Kitui'), ('machakos', 'Machakos'), ('makueni', 'Makueni'), ('nyandarua', 'Nyandarua'), ('nyeri', 'Nyeri'), ('kirinyaga', 'Kirinyaga'), ('muranga', "Murang'a"), ('kiambu', 'Kiambu'), ('turkana', 'Turkana'), ('west_pokot', 'West Pokot'), ('samburu', 'Samburu'), ('trans_nzoia', 'Trans Nzoia'), ('uasin_gishu', 'Uasin Gishu'), ('elgeyo_marakwet', 'Elgeyo-Marakwet'), ('nandi', 'Nandi'), ('baringo', 'Baringo'), ('laikipia', 'Laikipia'), ('nakuru', 'Nakuru'), ('narok', 'Narok'), ('kajiado', 'Kajiado'), ('kericho', 'Kericho'), ('bomet', 'Bomet'), ('kakamega', 'Kakamega'), ('vihiga', 'Vihiga'), ('bungoma', 'Bungoma'), ('busia', 'Busia'), ('siaya', 'Siaya'), ('kisumu', 'Kisumu'), ('homa_bay', 'Homa Bay'), ('migori', 'Migori'), ('kisii', 'Kisii'), ('nyamira', 'Nyamira')], max_length=50)),
+                ('sublocation', models.CharField(choices=[('central', 'Central'), ('east', 'East'), ('west', 'West'), ('north', 'North'), ('south', 'South'), ('urban', 'Urban'), ('rural', 'Rural')], max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('completed', 'Completed')], max_length=20)),
+                ('day', models.DateField()),
+                ('report_count', models.IntegerField(default=0)),
+                ('active_rate_sum', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_entries', models.IntegerField(default=0)),
+                ('active_entries', models.IntegerField(default=0)),
+                ('completed_entries', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('county', 'sublocation', 'status', 'day')},
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_reportrollup'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['role', 'is_active'], name='user_role_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['role', 'date_joined'], name='user_role_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['created_at', 'id'], name='report_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['assigned_to', 'created_at', 'id'], name='report_assignee_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['county', 'created_at', 'id'], name='report_county_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['county', 'status'], name='report_county_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportdata',
+            index=models.Index(fields=['created_at', 'id'], name='reportdata_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportdata',
+            index=models.Index(fields=['report', 'status'], name='reportdata_report_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportdata',
+            index=models.Index(fields=['report', 'created_at', 'id'], name='reportdata_report_created_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:55
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_report_location(apps, schema_editor):
+    Report = apps.get_model('api', 'Report')
+    ReportData = apps.get_model('api', 'ReportData')
+    parent = Report.objects.filter(pk=OuterRef('report_id'))
+    ReportData.objects.update(
+        county=Subquery(parent.values('county')[:1]),
+        sublocation=Subquery(parent.values('sublocation')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_role_scoped_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportdata',
+            name='county',
+            field=models.CharField(choices=[('nairobi', 'Nairobi'), ('mombasa', 'Mombasa'), ('kwale', 'Kwale'), ('kilifi', 'Kilifi'), ('tana_river', 'Tana River'), ('lamu', 'Lamu'), ('taita_taveta', 'Taita Taveta'), ('garissa', 'Garissa'), ('wajir', 'Wajir'), ('mandera', 'Mandera'), ('marsabit', 'Marsabit'), ('isiolo', 'Isiolo'), ('meru', 'Meru'), ('tharaka_nithi', 'Tharaka-Nithi'), ('embu', 'Embu'), ('kitui', 'Kitui'), ('machakos', 'Machakos'), ('makueni', 'Makueni'), ('nyandarua', 'Nyandarua'), ('nyeri', 'Nyeri'), ('kirinyaga', 'Kirinyaga'), ('muranga', "Murang'a"), ('kiambu', 'Kiambu'), ('turkana', 'Turkana'), ('west_pokot', 'West Pokot'), ('samburu', 'Samburu'), ('trans_nzoia', 'Trans Nzoia'), ('uasin_gishu', 'Uasin Gishu'), ('elgeyo_marakwet', 'Elgeyo-Marakwet'), ('nandi', 'Nandi'), ('baringo', 'Baringo'), ('laikipia', 'Laikipia'), ('nakuru', 'Nakuru'), ('narok', 'Narok'), ('kajiado', 'Kajiado'), ('kericho', 'Kericho'), ('bomet', 'Bomet'), ('kakamega', 'Kakamega'), ('vihiga', 'Vihiga'), ('bungoma', 'Bungoma'), ('busia', 'Busia'), ('siaya', 'Siaya'), ('kisumu', 'Kisumu'), ('homa_bay', 'Homa Bay'), ('migori', 'Migori'), ('kisii', 'Kisii'), ('nyamira', 'Nyamira')], default='', editable=False, max_length=50),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='reportdata',
+            name='sublocation',
+            field=models.CharField(choices=[('central', 'Central'), ('east', 'East'), ('west', 'West'), ('north', 'North'), ('south', 'South'), ('urban', 'Urban'), ('rural', 'Rural')], default='', editable=False, max_length=50),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_report_location, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='reportdata',
+            index=models.Index(fields=['county', 'created_at', 'id'], name='reportdata_county_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportdata',
+            index=models.Index(fields=['county', 'status'], name='reportdata_county_status_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_reportdata_location'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='report',
+            name='assigned_to',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='assigned_reports', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='created_by',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='created_reports', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
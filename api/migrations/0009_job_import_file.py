@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('export', 'Export'), ('import', 'Import'), ('import_file', 'Import file'), ('rebuild_stats', 'Rebuild statistics')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:18
+
+import api.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    api.search.create_search_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    api.search.drop_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_tombstone_updated_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportDataSearch',
+            fields=[
+                ('row', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='api.reportdata')),
+                ('document', api.search.FullTextField(db_column='api_reportdata_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'api_reportdata_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index, hints={'model_name': 'reportdata'}),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:41
+
+import api.search
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_report_title(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Report = apps.get_model('api', 'Report')
+    ReportData = apps.get_model('api', 'ReportData')
+    parent = Report.objects.using(db).filter(pk=OuterRef('report_id'))
+    ReportData.objects.using(db).update(report_title=Subquery(parent.values('title')[:1]))
+
+
+def create_search_index(apps, schema_editor):
+    # Adding the column rebuilt api_reportdata, which dropped the index triggers
+    api.search.create_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_reportdata_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportdata',
+            name='report_title',
+            field=models.CharField(default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(copy_report_title, migrations.RunPython.noop, hints={'model_name': 'reportdata'}),
+        migrations.RunPython(create_search_index, migrations.RunPython.noop, hints={'model_name': 'reportdata'}),
+    ]
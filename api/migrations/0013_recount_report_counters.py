@@ -0,0 +1,75 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:52
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def _rate(part, total):
+    if not total:
+        return Decimal(0)
+    return (Decimal(part) * 100 / total).quantize(Decimal('0.01'))
+
+
+def recount_counters(apps, schema_editor):
+    """Recount every counter and rate; 0002 only filled in the active and completed counts"""
+    db = schema_editor.connection.alias
+    Report = apps.get_model('api', 'Report')
+    ReportRollup = apps.get_model('api', 'ReportRollup')
+    fields = ['total_entries', 'active_count', 'completed_count', 'active_rate', 'completion_rate']
+
+    reports = Report.objects.using(db).annotate(
+        row_total=Count('data_rows'),
+        row_active=Count('data_rows', filter=Q(data_rows__is_active=True)),
+        row_completed=Count('data_rows', filter=Q(data_rows__status='completed')),
+    ).only('id').order_by('id')
+    batch = []
+    for report in reports.iterator(chunk_size=500):
+        report.total_entries = report.row_total
+        report.active_count = report.row_active
+        report.completed_count = report.row_completed
+        report.active_rate = _rate(report.row_active, report.row_total)
+        report.completion_rate = _rate(report.row_completed, report.row_total)
+        batch.append(report)
+        if len(batch) >= 500:
+            Report.objects.using(db).bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Report.objects.using(db).bulk_update(batch, fields)
+
+    # The rollups summed the stale counters, so rebuild them from the new ones
+    buckets = Report.objects.using(db).annotate(day=TruncDate('created_at')).values(
+        'county', 'sublocation', 'status', 'day'
+    ).annotate(
+        report_count=Count('id'),
+        active_rate_sum=Sum('active_rate'),
+        total_entries_sum=Sum('total_entries'),
+        active_entries=Sum('active_count'),
+        completed_entries=Sum('completed_count'),
+    ).order_by()
+    ReportRollup.objects.using(db).all().delete()
+    ReportRollup.objects.using(db).bulk_create([
+        ReportRollup(
+            county=bucket['county'], sublocation=bucket['sublocation'],
+            status=bucket['status'], day=bucket['day'],
+            report_count=bucket['report_count'],
+            active_rate_sum=bucket['active_rate_sum'] or 0,
+            total_entries=bucket['total_entries_sum'] or 0,
+            active_entries=bucket['active_entries'] or 0,
+            completed_entries=bucket['completed_entries'] or 0,
+        )
+        for bucket in buckets
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_reportdata_report_title'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_counters, migrations.RunPython.noop, hints={'model_name': 'report'}),
+    ]
@@ -1,7 +1,17 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, router, transaction
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
 import uuid
 
+from .caching import invalidate_on_commit
+from .search import SEARCH_TABLE, FullTextField
+from .sharding import ShardRoutedQuerySet, shard_aliases, shard_querysets
+
 class CustomUser(AbstractUser):
     ROLE_CHOICES = (
         ('agent', 'Agent'),
@@ -77,6 +87,13 @@ class CustomUser(AbstractUser):
     employee_id = models.CharField(max_length=20, unique=True, blank=True)
     is_active = models.BooleanField(default=True)
     
+    class Meta(AbstractUser.Meta):
+        swappable = 'AUTH_USER_MODEL'
+        indexes = [
+            models.Index(fields=['role', 'is_active'], name='user_role_active_idx'),
+            models.Index(fields=['role', 'date_joined'], name='user_role_joined_idx'),
+        ]
+    
     def save(self, *args, **kwargs):
         if not self.employee_id and self.role in ['agent', 'supervisor']:
             # Generate unique employee ID
@@ -89,6 +106,13 @@ class CustomUser(AbstractUser):
                 self.set_password(self.employee_id)
         super().save(*args, **kwargs)
     
+    def delete(self, *args, **kwargs):
+        # Reports on county shards are out of reach of the cascade on default
+        for alias in shard_aliases():
+            for report in Report.objects.using(alias).filter(Q(assigned_to=self) | Q(created_by=self)):
+                report.delete()
+        return super().delete(*args, **kwargs)
+    
     def __str__(self):
         return f"{self.employee_id} - {self.get_full_name() or self.username}"
 
@@ -104,34 +128,277 @@ class Report(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     county = models.CharField(max_length=50, choices=CustomUser.COUNTY_CHOICES)
     sublocation = models.CharField(max_length=50, choices=CustomUser.SUBLOCATION_CHOICES)
-    assigned_to = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='assigned_reports')
-    created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='created_reports')
+    # No database constraint: with county sharding, users stay on default
+    assigned_to = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='assigned_reports', db_constraint=False)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='created_reports', db_constraint=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     # Auto-calculated fields
     total_entries = models.IntegerField(default=0)
+    active_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
     active_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     completion_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     
     # Editable field
     manager_feedback = models.TextField(blank=True)
     
-    def update_calculated_fields(self):
-        """Update auto-calculated fields based on report data"""
-        data_rows = self.data_rows.all()
-        if data_rows.exists():
-            self.total_entries = data_rows.count()
-            active_count = data_rows.filter(is_active=True).count()
-            completed_count = data_rows.filter(status='completed').count()
-            
-            self.active_rate = (active_count / self.total_entries) * 100 if self.total_entries > 0 else 0
-            self.completion_rate = (completed_count / self.total_entries) * 100 if self.total_entries > 0 else 0
-            self.save()
+    objects = ShardRoutedQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='report_created_idx'),
+            models.Index(fields=['assigned_to', 'created_at', 'id'], name='report_assignee_created_idx'),
+            models.Index(fields=['county', 'created_at', 'id'], name='report_county_created_idx'),
+            models.Index(fields=['county', 'status'], name='report_county_status_idx'),
+            models.Index(fields=['updated_at', 'id'], name='report_updated_idx'),
+        ]
     
+    def set_counters(self, total, active, completed):
+        """Set the stored counters and derive the rates from them"""
+        self.total_entries = total
+        self.active_count = active
+        self.completed_count = completed
+        self.active_rate = (active / total) * 100 if total > 0 else 0
+        self.completion_rate = (completed / total) * 100 if total > 0 else 0
+
+    def update_calculated_fields(self):
+        """Recount auto-calculated fields from report data (full rebuild)"""
+        counts = self.data_rows.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+            completed=Count('id', filter=Q(status='completed')),
+        )
+        self.set_counters(counts['total'], counts['active'], counts['completed'])
+        self.save(update_fields=[
+            'total_entries', 'active_count', 'completed_count',
+            'active_rate', 'completion_rate', 'updated_at',
+        ])
+
+    @classmethod
+    def recount(cls, report_ids, using=None):
+        """Recount the counters of several reports with one grouped aggregate"""
+        counts = {
+            row['report_id']: row
+            for row in ReportData.objects.using(using).filter(report_id__in=report_ids).values('report_id').annotate(
+                total=Count('id'),
+                active=Count('id', filter=Q(is_active=True)),
+                completed=Count('id', filter=Q(status='completed')),
+            ).order_by()
+        }
+        for report in cls.objects.using(using).filter(pk__in=report_ids):
+            row = counts.get(report.pk, {'total': 0, 'active': 0, 'completed': 0})
+            report.set_counters(row['total'], row['active'], row['completed'])
+            report.save(update_fields=list(cls.COUNTER_FIELDS) + ['updated_at'])
+
+    @classmethod
+    def apply_entry_delta(cls, report_id, total=0, active=0, completed=0, using=None):
+        """Adjust the stored counters of a report in a single UPDATE.
+
+        Rates are derived from the adjusted counters inside the same
+        statement, so concurrent row writes never read-modify-write them.
+        The report's ReportRollup contribution is moved by the same delta.
+        """
+        if not (total or active or completed):
+            return
+        new_total = F('total_entries') + total
+
+        def rate(counter, delta):
+            return Case(
+                When(total_entries__lte=-total, then=Value(0)),
+                default=ExpressionWrapper(
+                    (F(counter) + delta) * 100.0 / new_total,
+                    output_field=DecimalField(max_digits=5, decimal_places=2),
+                ),
+                output_field=DecimalField(max_digits=5, decimal_places=2),
+            )
+
+        with transaction.atomic(using=using):
+            # Lock the report so its rollup contribution can be moved exactly
+            report = cls.objects.using(using).select_for_update().only(*cls.ROLLUP_FIELDS).filter(pk=report_id).first()
+            if report is None:
+                return
+            cls.objects.using(using).filter(pk=report_id).update(
+                total_entries=new_total,
+                active_count=F('active_count') + active,
+                completed_count=F('completed_count') + completed,
+                active_rate=rate('active_count', active),
+                completion_rate=rate('completed_count', completed),
+                updated_at=timezone.now(),
+            )
+            invalidate_on_commit(using)
+            previous = report.rollup_state()
+            report.set_counters(
+                report.total_entries + total,
+                report.active_count + active,
+                report.completed_count + completed,
+            )
+            ReportRollup.move(previous, report.rollup_state(), using=using)
+
+    COUNTER_FIELDS = ('total_entries', 'active_count', 'completed_count', 'active_rate', 'completion_rate')
+    ROLLUP_FIELDS = ('county', 'sublocation', 'status', 'created_at') + COUNTER_FIELDS
+
+    def rollup_state(self):
+        """Return this report's (bucket key, counter values) in ReportRollup"""
+        key = (self.county, self.sublocation, self.status, timezone.localdate(self.created_at))
+        values = (
+            1, Decimal(str(self.active_rate)).quantize(Decimal('0.01')),
+            self.total_entries, self.active_count, self.completed_count,
+        )
+        return key, values
+
+    @staticmethod
+    def denormalized_state(report):
+        """The report fields copied onto each of its data rows"""
+        return report.county, report.sublocation, report.title
+
+    def _stored(self, using):
+        return Report.objects.using(using).select_for_update().only(
+            *self.ROLLUP_FIELDS, 'assigned_to', 'title'
+        ).filter(pk=self.pk).first()
+
+    def save(self, *args, **kwargs):
+        kwargs['using'] = kwargs.get('using') or router.db_for_write(Report, instance=self)
+        with transaction.atomic(using=kwargs['using']):
+            stored = None if self._state.adding else self._stored(kwargs['using'])
+            if stored is not None:
+                # Counters are maintained by delta updates; a plain save must not
+                # overwrite them with the possibly stale values held in memory
+                if kwargs.get('update_fields') is None:
+                    kwargs['update_fields'] = [
+                        field.name for field in self._meta.concrete_fields
+                        if not field.primary_key and field.name not in self.COUNTER_FIELDS
+                    ]
+                if not set(kwargs['update_fields']) & set(self.COUNTER_FIELDS):
+                    for name in self.COUNTER_FIELDS:
+                        setattr(self, name, getattr(stored, name))
+            super().save(*args, **kwargs)
+            if stored is not None and self.denormalized_state(stored) != self.denormalized_state(self):
+                # Keep the rows' denormalized copies in step, in one UPDATE
+                self.data_rows.update(
+                    county=self.county, sublocation=self.sublocation, report_title=self.title,
+                    updated_at=timezone.now(),
+                )
+            if stored is not None and (stored.county, stored.assigned_to_id) != (self.county, self.assigned_to_id):
+                # Whoever saw the report under its old county or assignee must drop it
+                Tombstone.objects.using(kwargs['using']).create(
+                    kind='report', object_id=self.pk, county=stored.county, assigned_to_id=stored.assigned_to_id
+                )
+            ReportRollup.move(stored.rollup_state() if stored else None, self.rollup_state(), using=kwargs['using'])
+
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(Report, instance=self)
+        with transaction.atomic(using=using):
+            stored = self._stored(using)
+            result = super().delete(using=using, keep_parents=keep_parents)
+            if stored is not None:
+                ReportRollup.move(stored.rollup_state(), None, using=using)
+        return result
+
     def __str__(self):
         return f"{self.title} - {self.county}"
 
+class ReportRollup(models.Model):
+    """Report totals per county, sublocation, status and creation day.
+
+    Kept in step with Report and ReportData writes so manager statistics
+    read a handful of pre-aggregated rows instead of scanning every report.
+    """
+    county = models.CharField(max_length=50, choices=CustomUser.COUNTY_CHOICES)
+    sublocation = models.CharField(max_length=50, choices=CustomUser.SUBLOCATION_CHOICES)
+    status = models.CharField(max_length=20, choices=Report.STATUS_CHOICES)
+    day = models.DateField()
+    
+    report_count = models.IntegerField(default=0)
+    active_rate_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_entries = models.IntegerField(default=0)
+    active_entries = models.IntegerField(default=0)
+    completed_entries = models.IntegerField(default=0)
+    
+    COUNTER_FIELDS = ('report_count', 'active_rate_sum', 'total_entries', 'active_entries', 'completed_entries')
+    
+    class Meta:
+        unique_together = ['county', 'sublocation', 'status', 'day']
+    
+    @classmethod
+    def adjust(cls, key, deltas, using=None):
+        """Add ``deltas`` to the counters of one bucket, creating it if needed"""
+        if not any(deltas):
+            return
+        county, sublocation, status, day = key
+        bucket = cls.objects.using(using).filter(county=county, sublocation=sublocation, status=status, day=day)
+        updates = {name: F(name) + delta for name, delta in zip(cls.COUNTER_FIELDS, deltas)}
+        with transaction.atomic(using=using):
+            if not bucket.update(**updates):
+                cls.objects.using(using).get_or_create(county=county, sublocation=sublocation, status=status, day=day)
+                bucket.update(**updates)
+    
+    @classmethod
+    def move(cls, previous, current, using=None):
+        """Replace a report's ``previous`` contribution with ``current``"""
+        if previous is not None and current is not None and previous[0] == current[0]:
+            cls.adjust(current[0], [new - old for new, old in zip(current[1], previous[1])], using)
+            return
+        if previous is not None:
+            cls.adjust(previous[0], [-value for value in previous[1]], using)
+        if current is not None:
+            cls.adjust(current[0], current[1], using)
+    
+    @classmethod
+    def rebuild(cls, batch_size=500, using=None):
+        """Recompute every bucket from the reports table"""
+        buckets = Report.objects.using(using).annotate(day=TruncDate('created_at')).values(
+            'county', 'sublocation', 'status', 'day'
+        ).annotate(
+            report_count=Count('id'),
+            active_rate_sum=Sum('active_rate'),
+            total_entries_sum=Sum('total_entries'),
+            active_entries=Sum('active_count'),
+            completed_entries=Sum('completed_count'),
+        ).order_by()
+        with transaction.atomic(using=using):
+            cls.objects.using(using).all().delete()
+            created = cls.objects.using(using).bulk_create([
+                cls(
+                    county=bucket['county'], sublocation=bucket['sublocation'],
+                    status=bucket['status'], day=bucket['day'],
+                    report_count=bucket['report_count'],
+                    active_rate_sum=bucket['active_rate_sum'] or 0,
+                    total_entries=bucket['total_entries_sum'] or 0,
+                    active_entries=bucket['active_entries'] or 0,
+                    completed_entries=bucket['completed_entries'] or 0,
+                )
+                for bucket in buckets.iterator()
+            ], batch_size=batch_size)
+        return len(created)
+    
+    def __str__(self):
+        return f"{self.county}/{self.sublocation} {self.status} {self.day}"
+
+class ReportEntrySequence(models.Model):
+    """Per-report counter that hands out ReportData entry numbers"""
+    report = models.OneToOneField(Report, on_delete=models.CASCADE, primary_key=True, related_name='entry_sequence')
+    last_number = models.PositiveIntegerField(default=0)
+    
+    @classmethod
+    def reserve(cls, report_id, count=1, using=None):
+        """Atomically reserve ``count`` consecutive numbers and return the first.
+
+        The increment is a single UPDATE, so the counter row is locked for the
+        rest of the transaction and concurrent writers get disjoint blocks.
+        """
+        with transaction.atomic(using=using):
+            sequence = cls.objects.using(using).filter(report_id=report_id)
+            if not sequence.update(last_number=F('last_number') + count):
+                cls.objects.using(using).get_or_create(report_id=report_id)
+                sequence.update(last_number=F('last_number') + count)
+            last_number = sequence.values_list('last_number', flat=True).get()
+        return last_number - count + 1
+    
+    def __str__(self):
+        return f"{self.report_id} - {self.last_number}"
+
 class ReportData(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -139,6 +406,7 @@ class ReportData(models.Model):
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
     )
+    ACTIVE_STATUSES = ('in_progress', 'completed')
     
     report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='data_rows')
     entry_number = models.CharField(max_length=50, unique=True)
@@ -172,25 +440,319 @@ class ReportData(models.Model):
     agent_feedback = models.TextField(blank=True)
     supervisor_feedback = models.TextField(blank=True)
     
+    # Denormalized from the parent report so scoped queries need no join
+    county = models.CharField(max_length=50, choices=CustomUser.COUNTY_CHOICES, editable=False)
+    sublocation = models.CharField(max_length=50, choices=CustomUser.SUBLOCATION_CHOICES, editable=False)
+    report_title = models.CharField(max_length=200, editable=False, default='')
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ShardRoutedQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['report', 'entry_number']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='reportdata_created_idx'),
+            models.Index(fields=['report', 'status'], name='reportdata_report_status_idx'),
+            models.Index(fields=['report', 'created_at', 'id'], name='reportdata_report_created_idx'),
+            models.Index(fields=['county', 'created_at', 'id'], name='reportdata_county_created_idx'),
+            models.Index(fields=['county', 'status'], name='reportdata_county_status_idx'),
+            models.Index(fields=['updated_at', 'id'], name='reportdata_updated_idx'),
+        ]
     
+    @staticmethod
+    def format_entry_number(report_id, number):
+        return f"{report_id}-ENT-{number:04d}"
+
+    @classmethod
+    def reserve_entry_numbers(cls, report_id, count=1, using=None):
+        """Return the first of ``count`` consecutive entry numbers for a report"""
+        return ReportEntrySequence.reserve(report_id, count, using)
+
+    @classmethod
+    def bulk_create_for_report(cls, report, entries, batch_size=500):
+        """Insert many rows for one report in a single transaction.
+
+        Entry numbers are allocated as one block and the parent report
+        counters are adjusted once for the whole batch.
+        """
+        rows = [entry if isinstance(entry, cls) else cls(**entry) for entry in entries]
+        if not rows:
+            return []
+        using = router.db_for_write(Report, instance=report)
+        with transaction.atomic(using=using):
+            start = cls.reserve_entry_numbers(report.id, len(rows), using)
+            active = completed = 0
+            for offset, row in enumerate(rows):
+                row.report = report
+                row.entry_number = cls.format_entry_number(report.id, start + offset)
+                row.is_active = row.status in cls.ACTIVE_STATUSES
+                row.county = report.county
+                row.sublocation = report.sublocation
+                row.report_title = report.title
+                active += row.is_active
+                completed += row.status == 'completed'
+            created = cls.objects.using(using).bulk_create(rows, batch_size=batch_size)
+            Report.apply_entry_delta(report.id, len(rows), active, completed, using=using)
+        return created
+
+    @classmethod
+    def bulk_update_rows(cls, queryset, **changes):
+        """Apply status and feedback ``changes`` to every row of ``queryset``.
+
+        Each database gets one UPDATE, with is_active set from the new status
+        in the same statement, and every affected report is recounted once.
+        Returns the number of rows updated and the affected report ids.
+        """
+        if 'status' in changes:
+            changes['is_active'] = Value(changes['status'] in cls.ACTIVE_STATUSES)
+        changes['updated_at'] = timezone.now()
+        updated = 0
+        report_ids = set()
+        for shard_queryset in shard_querysets(queryset):
+            using = shard_queryset.db
+            with transaction.atomic(using=using):
+                affected = set(shard_queryset.order_by().values_list('report_id', flat=True).distinct())
+                updated += shard_queryset.update(**changes)
+                Report.recount(affected, using)
+            report_ids |= affected
+        return updated, sorted(report_ids)
+
+    def _counter_state(self, report_id, status):
+        return report_id, 1, int(status in self.ACTIVE_STATUSES), int(status == 'completed')
+
+    def _stored_state(self, using):
+        """The stored row's (report_id, status), locked until the surrounding transaction ends"""
+        return ReportData.objects.using(using).select_for_update().filter(pk=self.pk).values_list(
+            'report_id', 'status'
+        ).first()
+
+    def _tombstone_old_scope(self, old_report_id, using):
+        """Record that the row left the county and assignee of its old report"""
+        old_scope = Report.objects.using(using).filter(pk=old_report_id).values_list(
+            'county', 'assigned_to_id'
+        ).first()
+        if old_scope is not None and old_scope != (self.report.county, self.report.assigned_to_id):
+            Tombstone.objects.using(using).create(
+                kind='reportdata', object_id=self.pk, county=old_scope[0], assigned_to_id=old_scope[1]
+            )
+
+    def _copy_report_fields(self, using):
+        """Copy the parent report's location and title onto this row"""
+        if ReportData.report.is_cached(self):
+            state = Report.denormalized_state(self.report)
+        else:
+            state = Report.objects.using(using).filter(pk=self.report_id).values_list(
+                'county', 'sublocation', 'title'
+            ).get()
+        self.county, self.sublocation, self.report_title = state
+
     def save(self, *args, **kwargs):
+        # Auto-calculate is_active based on status
+        self.is_active = self.status in self.ACTIVE_STATUSES
+        using = kwargs['using'] = kwargs.get('using') or router.db_for_write(ReportData, instance=self)
+        
         # Auto-generate entry number if not provided
         if not self.entry_number:
-            last_entry = ReportData.objects.filter(report=self.report).order_by('-id').first()
-            last_num = int(last_entry.entry_number.split('-')[-1]) if last_entry else 0
-            self.entry_number = f"{self.report.id}-ENT-{last_num + 1:04d}"
-        
-        # Auto-calculate is_active based on status
-        self.is_active = self.status in ['in_progress', 'completed']
+            self.entry_number = self.format_entry_number(
+                self.report_id, self.reserve_entry_numbers(self.report_id, using=using)
+            )
         
-        super().save(*args, **kwargs)
-        # Update parent report calculated fields
-        self.report.update_calculated_fields()
+        with transaction.atomic(using=using):
+            stored = None if self._state.adding else self._stored_state(using)
+            report_id, status = self.report_id, self.status
+            update_fields = kwargs.get('update_fields')
+            if stored is not None and update_fields is not None:
+                # Fields left out keep their stored values, and so do the counters they feed
+                update_fields = set(update_fields)
+                if not update_fields & {'report', 'report_id'}:
+                    report_id = stored[0]
+                if 'status' in update_fields:
+                    update_fields.add('is_active')
+                else:
+                    status = stored[1]
+                    update_fields.discard('is_active')
+                kwargs['update_fields'] = update_fields
+            previous = None if stored is None else self._counter_state(*stored)
+            # The copies only change with the parent; Report.save keeps them in step after that
+            if previous is None or previous[0] != report_id:
+                self._copy_report_fields(using)
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'county', 'sublocation', 'report_title'}
+            super().save(*args, **kwargs)
+            current = self._counter_state(report_id, status)
+            # Update parent report counters by delta instead of recounting
+            if previous is None or previous[0] != current[0]:
+                if previous is not None:
+                    Report.apply_entry_delta(previous[0], *(-n for n in previous[1:]), using=using)
+                    self._tombstone_old_scope(previous[0], using)
+                Report.apply_entry_delta(current[0], *current[1:], using=using)
+            else:
+                Report.apply_entry_delta(
+                    current[0], *(new - old for new, old in zip(current[1:], previous[1:])), using=using
+                )
+    
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(ReportData, instance=self)
+        with transaction.atomic(using=using):
+            stored = self._stored_state(using)
+            result = super().delete(using=using, keep_parents=keep_parents)
+            if stored is not None:
+                previous = self._counter_state(*stored)
+                Report.apply_entry_delta(previous[0], *(-n for n in previous[1:]), using=using)
+        return result
+    
+    def __str__(self):
+        return f"{self.entry_number} - {self.customer_name}"
+class ReportDataSearch(models.Model):
+    """The FTS5 index over ReportData's text columns, on SQLite only.
+
+    The virtual table and the triggers that keep it in step are created by a
+    migration (see api.search); this model only lets querysets join to it.
+    """
+    row = models.OneToOneField(
+        ReportData, primary_key=True, on_delete=models.DO_NOTHING, db_column='rowid',
+        db_constraint=False, related_name='search'
+    )
+    document = FullTextField(db_column=SEARCH_TABLE)
+    rank = models.FloatField()
+    
+    class Meta:
+        managed = False
+        db_table = SEARCH_TABLE
+
+class Tombstone(models.Model):
+    """Records a deleted report or report data row for the delta-sync feed.
+
+    Kept on the same database as the deleted row, with the county and
+    assignee it was visible under, so the feed can scope deletions like rows.
+    Rows that move out of a county or away from an assignee get one too, so
+    the clients that can no longer see them drop them.
+    """
+    KIND_CHOICES = (
+        ('report', 'Report'),
+        ('reportdata', 'Report data'),
+    )
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    county = models.CharField(max_length=50, choices=CustomUser.COUNTY_CHOICES)
+    assigned_to = models.ForeignKey(
+        CustomUser, on_delete=models.DO_NOTHING, related_name='+', db_constraint=False
+    )
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    objects = ShardRoutedQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'deleted_at'], name='tombstone_kind_deleted_idx'),
+            models.Index(fields=['kind', 'county', 'deleted_at'], name='tombstone_county_deleted_idx'),
+            models.Index(fields=['kind', 'assigned_to', 'deleted_at'], name='tombstone_assignee_deleted_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+class Job(models.Model):
+    """Background work queued in the database and run by the run_jobs command"""
+    KIND_CHOICES = (
+        ('export', 'Export'),
+        ('import', 'Import'),
+        ('import_file', 'Import file'),
+        ('rebuild_stats', 'Rebuild statistics'),
+    )
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    params = models.JSONField(default=dict, blank=True)
+    
+    # Progress reported by the handler while it runs
+    progress = models.PositiveSmallIntegerField(default=0)
+    message = models.CharField(max_length=200, blank=True)
+    
+    # Outcome
+    result = models.JSONField(null=True, blank=True)
+    result_file = models.FileField(upload_to='jobs/%Y/%m/', blank=True)
+    error = models.TextField(blank=True)
+    
+    created_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='jobs')
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Renewed by the worker while the job runs; a job whose lease has lapsed is claimed again
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at', 'id'], name='job_status_created_idx'),
+            models.Index(fields=['created_by', 'created_at', 'id'], name='job_creator_created_idx'),
+        ]
+    
+    @staticmethod
+    def lease():
+        return timedelta(seconds=getattr(settings, 'JOB_LEASE_SECONDS', 300))
+
+    @classmethod
+    def claim(cls, worker):
+        """Mark the oldest claimable job as running for ``worker`` and return it.
+
+        Queued jobs are claimable, and so are running jobs whose worker has
+        not renewed their lease in time, which presumably died; those run
+        again from the start. The conditional UPDATE is the lock: when two
+        workers race for the same job only one of them changes the row, and
+        the other tries the next.
+        """
+        while True:
+            claimable = Q(status='queued') | Q(status='running', heartbeat_at__lt=timezone.now() - cls.lease())
+            job_id = cls.objects.filter(claimable).order_by('created_at', 'id').values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+            now = timezone.now()
+            claimed = cls.objects.filter(claimable, pk=job_id).update(
+                status='running', worker=worker, started_at=now, heartbeat_at=now,
+            )
+            if claimed:
+                return cls.objects.get(pk=job_id)
+
+    @classmethod
+    def renew_leases(cls, worker, job_ids):
+        """Extend the leases of the jobs ``worker`` is still running"""
+        return cls.objects.filter(pk__in=job_ids, status='running', worker=worker).update(
+            heartbeat_at=timezone.now()
+        )
+    
+    def set_progress(self, progress, message=None):
+        """Record progress as a percentage, writing only when it changes"""
+        progress = max(0, min(int(progress), 100))
+        if progress == self.progress and (message is None or message == self.message):
+            return
+        self.progress = progress
+        if message is not None:
+            self.message = message[:200]
+        Job.objects.filter(pk=self.pk).update(progress=self.progress, message=self.message, heartbeat_at=timezone.now())
+    
+    def succeed(self, result=None):
+        self.status = 'succeeded'
+        self.progress = 100
+        self.result = result
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'progress', 'result', 'result_file', 'finished_at'])
+    
+    def fail(self, error, result=None):
+        self.status = 'failed'
+        self.error = error
+        self.result = result
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'error', 'result', 'finished_at'])
     
     def __str__(self):
-        return f"{self.entry_number} - {self.customer_name}"
\ No newline at end of file
+        return f"{self.kind} #{self.pk} ({self.status})"
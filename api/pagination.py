@@ -0,0 +1,129 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CreatedAtCursorPagination(BasePagination):
+    """Keyset pagination over ``(created_at, id)``, newest first.
+
+    The cursor carries the position of the last row on the page, so each
+    page is an indexed range scan however deep the client goes, and rows
+    inserted while paging never shift or duplicate later pages.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        return self.finish_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of paginate_queryset, for async list views"""
+        queryset = self.page_queryset(queryset, request)
+        return self.finish_page([row async for row in queryset])
+
+    def page_queryset(self, queryset, request):
+        """Order and bound ``queryset`` for the requested page, without running it"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request)
+
+        if self.reverse:
+            queryset = queryset.order_by('created_at', 'id')
+        else:
+            queryset = queryset.order_by('-created_at', '-id')
+        if self.position is not None:
+            created_at, pk = self.position
+            if self.reverse:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            else:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        # Fetch one extra row to learn whether there is a further page
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, page):
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if self.reverse:
+            page.reverse()
+
+        self.has_next = has_more if not self.reverse else self.position is not None
+        self.has_previous = (self.position is not None) if not self.reverse else has_more
+        self.first = page[0] if page else None
+        self.last = page[-1] if page else None
+        return page
+
+    def get_page_size(self, request):
+        page_size = getattr(settings, 'API_PAGE_SIZE', 50)
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            created_at = parse_datetime(tokens['c'][0])
+            pk = int(tokens['i'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (created_at, pk), reverse
+
+    def encode_cursor(self, row, reverse):
+        tokens = {'c': row.created_at.isoformat(), 'i': row.pk}
+        if reverse:
+            tokens['r'] = 1
+        encoded = b64encode(parse.urlencode(tokens).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.first, reverse=True)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,102 @@
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .caching import invalidate_on_commit
+from .models import CustomUser
+
+EMPLOYEE_ID_PREFIXES = {'agent': 'AGT', 'supervisor': 'SUP'}
+
+# Below this many passwords a pool costs more to start than it saves
+MIN_POOL_PASSWORDS = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def password_hash_workers():
+    return getattr(settings, 'PASSWORD_HASH_WORKERS', None) or os.cpu_count() or 1
+
+
+def hash_pool(workers=None):
+    """The process pool shared by every request, started on first use.
+
+    It is sized by the first caller (PASSWORD_HASH_WORKERS by default), so
+    concurrent provisioning requests queue for the same workers instead of
+    each forking their own.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers or password_hash_workers())
+        return _pool
+
+
+def generate_employee_ids(roles, using=None):
+    """Return one new employee ID per role in ``roles``, in the same order.
+
+    IDs are drawn in one batch and checked against existing users with a
+    single query; the rare collisions are redrawn.
+    """
+    ids = [None] * len(roles)
+    pending = list(range(len(roles)))
+    while pending:
+        for index in pending:
+            ids[index] = f"{EMPLOYEE_ID_PREFIXES[roles[index]]}{uuid.uuid4().hex[:8].upper()}"
+        taken = set(CustomUser.objects.using(using).filter(
+            employee_id__in=[ids[index] for index in pending]
+        ).values_list('employee_id', flat=True))
+        seen = set()
+        redraw = []
+        for index in pending:
+            if ids[index] in taken or ids[index] in seen:
+                redraw.append(index)
+            seen.add(ids[index])
+        pending = redraw
+    return ids
+
+
+def hash_passwords(passwords, workers=None):
+    """Hash ``passwords`` with the configured hasher, across the process pool.
+
+    Each hash is deliberately slow (PBKDF2), so a cohort is spread over the
+    pool's workers; ``workers=1`` hashes in this process. Workers only need
+    settings, which they load from DJANGO_SETTINGS_MODULE, not the app
+    registry.
+    """
+    workers = workers or password_hash_workers()
+    if workers == 1 or len(passwords) < MIN_POOL_PASSWORDS:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(hash_pool(workers).map(make_password, passwords, chunksize=chunksize))
+
+
+def provision_users(entries, workers=None, batch_size=500, using=None):
+    """Create agents and supervisors in bulk and return the saved users.
+
+    ``entries`` are validated field dicts. Each user gets a generated
+    employee ID, which is also the username and initial password unless
+    the entry gives its own, and all rows go in with bulk_create.
+    """
+    entries = [dict(entry) for entry in entries]
+    employee_ids = generate_employee_ids([entry['role'] for entry in entries], using=using)
+    passwords = []
+    for entry, employee_id in zip(entries, employee_ids):
+        entry['employee_id'] = employee_id
+        entry['username'] = entry.get('username') or employee_id
+        passwords.append(entry.pop('password', None) or employee_id)
+
+    users = [
+        CustomUser(**entry, password=password_hash)
+        for entry, password_hash in zip(entries, hash_passwords(passwords, workers))
+    ]
+    with transaction.atomic(using=using):
+        created = CustomUser.objects.using(using).bulk_create(users, batch_size=batch_size)
+        # bulk_create sends no post_save, which is what normally invalidates
+        invalidate_on_commit(using)
+    return created
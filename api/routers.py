@@ -0,0 +1,158 @@
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+from .sharding import SHARDED_MODELS, shard_aliases, shard_for_county, shard_for_pk, sharding_enabled
+
+REPLICA_DB_ALIAS = 'replica'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def replica_reads_active():
+    return _use_replica.get() and replica_configured()
+
+
+@contextmanager
+def replica_reads():
+    """Route reads made inside the block to the replica, if one is configured"""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Route reads made inside the block to the primary, even within replica_reads()"""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def wants_replica(request):
+    """Whether ``request`` may be served from the replica.
+
+    Only safe requests qualify, and not while the client is pinned to the
+    primary after one of its own writes. The user is loaded first so that
+    authentication always reads from the primary.
+    """
+    if not replica_configured() or request.method not in SAFE_METHODS:
+        return False
+    if getattr(request, 'replica_pinned', False):
+        return False
+    if hasattr(request, 'user') and not request.user.is_authenticated:
+        return False
+    return True
+
+
+def read_from_replica(view_func):
+    """Decorator for read-only function views that may run against the replica"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if wants_replica(request):
+            with replica_reads():
+                return view_func(request, *args, **kwargs)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def aread_from_replica(view_func):
+    """Async counterpart of read_from_replica.
+
+    ``request.user`` must already be loaded (see api.views.aauthenticate),
+    since it cannot be loaded lazily on the event loop.
+    """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        if wants_replica(request):
+            with replica_reads():
+                return await view_func(request, *args, **kwargs)
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """Viewset mixin that serves safe requests from the replica.
+
+    Eligibility is decided in initial(), once DRF has authenticated the
+    request, so token and basic auth clients qualify as well as sessions.
+    The replica is used from there until the response is returned.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with ExitStack() as self._replica_stack:
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if wants_replica(request):
+            self._replica_stack.enter_context(replica_reads())
+
+
+class CountyShardRouter:
+    """Place report data on the shard of its county when sharding is enabled"""
+
+    def _db_for(self, model, instance=None):
+        if not sharding_enabled():
+            return None
+        if model._meta.model_name not in SHARDED_MODELS:
+            # Users live on default only; never follow a sharded instance's alias
+            return None if replica_reads_active() else DEFAULT_DB_ALIAS
+        # Hints from users (e.g. assigning a report's owner) say nothing about the shard
+        if instance is None or instance._meta.model_name not in SHARDED_MODELS:
+            return None
+        # Stored rows stay where they are
+        if not instance._state.adding and instance._state.db in shard_aliases():
+            return instance._state.db
+        county = getattr(instance, 'county', None)
+        if county:
+            return shard_for_county(county)
+        report_id = getattr(instance, 'report_id', None)
+        if report_id:
+            return shard_for_pk(report_id)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        if model._meta.model_name not in SHARDED_MODELS:
+            return None
+        return self._db_for(model, hints.get('instance'))
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not sharding_enabled():
+            return None
+        # Sharded tables also exist, empty, on default so cascades from users resolve
+        if app_label == 'api' and model_name in SHARDED_MODELS:
+            return True
+        return db not in shard_aliases()
+
+
+class ReadReplicaRouter:
+    """Send reads to the replica inside replica_reads(), everything else to default"""
+
+    def db_for_read(self, model, **hints):
+        if replica_reads_active():
+            return REPLICA_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Instances read from the replica must still be saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data, so objects may relate across them
+        return True
@@ -0,0 +1,36 @@
+from .models import Report, ReportData
+from .sharding import for_pk, sharded
+
+
+def scoped_reports(user, queryset=None):
+    """Reports visible to ``user`` according to their role"""
+    if queryset is None:
+        queryset = Report.objects.all()
+    if user.role == 'agent':
+        return sharded(queryset.filter(assigned_to=user))
+    elif user.role == 'supervisor':
+        return sharded(queryset.filter(county=user.county), county=user.county)
+    elif user.role == 'manager':
+        return sharded(queryset)
+    return Report.objects.none()
+
+
+def scoped_report(user, report_id):
+    """The report ``report_id`` if ``user`` may see it.
+
+    Raises Report.DoesNotExist when it does not exist or is out of scope,
+    and TypeError or ValueError for ids that are not numbers.
+    """
+    return for_pk(scoped_reports(user), report_id).get(id=report_id)
+
+
+def scoped_report_data(user):
+    """Report data rows visible to ``user`` according to their role"""
+    queryset = ReportData.objects.all()
+    if user.role == 'agent':
+        return sharded(queryset.filter(report__assigned_to=user))
+    elif user.role == 'supervisor':
+        return sharded(queryset.filter(county=user.county), county=user.county)
+    elif user.role == 'manager':
+        return sharded(queryset)
+    return ReportData.objects.none()
@@ -0,0 +1,145 @@
+from functools import reduce
+from operator import and_, or_
+
+from django.core.checks import Error
+from django.db import connections, models
+from django.db.models import F, Q
+
+from .sharding import data_aliases, shard_querysets
+
+# Columns of ReportData covered by the full-text index
+SEARCH_FIELDS = ('customer_name', 'customer_phone', 'location', 'agent_feedback', 'supervisor_feedback')
+
+SEARCH_TABLE = 'api_reportdata_fts'
+
+# The trigram tokenizer indexes every 3-character substring, so any part of
+# a name or phone number of at least this length can be looked up
+MIN_TERM_LENGTH = 3
+
+SEARCH_TRIGGERS = {
+    'insert': (
+        f"CREATE TRIGGER {SEARCH_TABLE}_insert AFTER INSERT ON api_reportdata BEGIN "
+        f"INSERT INTO {SEARCH_TABLE}(rowid, {', '.join(SEARCH_FIELDS)}) "
+        f"VALUES (new.id, {', '.join('new.' + name for name in SEARCH_FIELDS)}); END"
+    ),
+    'delete': (
+        f"CREATE TRIGGER {SEARCH_TABLE}_delete AFTER DELETE ON api_reportdata BEGIN "
+        f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {', '.join(SEARCH_FIELDS)}) "
+        f"VALUES ('delete', old.id, {', '.join('old.' + name for name in SEARCH_FIELDS)}); END"
+    ),
+    # Only text changes touch the index; status updates leave it alone
+    'update': (
+        f"CREATE TRIGGER {SEARCH_TABLE}_update AFTER UPDATE OF {', '.join(SEARCH_FIELDS)} ON api_reportdata BEGIN "
+        f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {', '.join(SEARCH_FIELDS)}) "
+        f"VALUES ('delete', old.id, {', '.join('old.' + name for name in SEARCH_FIELDS)}); "
+        f"INSERT INTO {SEARCH_TABLE}(rowid, {', '.join(SEARCH_FIELDS)}) "
+        f"VALUES (new.id, {', '.join('new.' + name for name in SEARCH_FIELDS)}); END"
+    ),
+}
+
+
+class FullTextField(models.TextField):
+    """The hidden column of an FTS5 table that is named after the table itself"""
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+def create_search_index(schema_editor):
+    """Create the FTS5 index over ReportData and the triggers that maintain it.
+
+    SQLite only. Django rebuilds a table to alter it on SQLite, which drops
+    its triggers, so every migration that alters api_reportdata must end by
+    calling this again (see 0012); check_search_triggers reports any that
+    forgot.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        f"{', '.join(SEARCH_FIELDS)}, content='api_reportdata', content_rowid='id', tokenize='trigram')"
+    )
+    for name, sql in SEARCH_TRIGGERS.items():
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{name}")
+        schema_editor.execute(sql)
+    schema_editor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in SEARCH_TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{name}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def check_search_triggers(app_configs, databases=None, **kwargs):
+    """Database check: the triggers keeping the search index current must exist.
+
+    Without them the index silently stops seeing new and edited rows. Runs
+    with ``migrate`` and ``check --database``.
+    """
+    errors = []
+    for alias in data_aliases():
+        if alias not in (databases or ()) or connections[alias].vendor != 'sqlite':
+            continue
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'api_reportdata'"
+            )
+            present = {name for name, in cursor.fetchall()}
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [SEARCH_TABLE])
+            if cursor.fetchone() is None:
+                # Not migrated this far yet
+                continue
+        missing = sorted({f'{SEARCH_TABLE}_{name}' for name in SEARCH_TRIGGERS} - present)
+        if missing:
+            errors.append(Error(
+                f'The search index triggers {", ".join(missing)} are missing on {alias!r}.',
+                hint='A migration rebuilt api_reportdata without calling api.search.create_search_index.',
+                obj=alias, id='api.E002',
+            ))
+    return errors
+
+
+def _phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _contains_any(term):
+    return reduce(or_, (Q(**{f'{name}__icontains': term}) for name in SEARCH_FIELDS))
+
+
+def search_terms(query):
+    """Split a search box query into terms, or return None if no term is long enough"""
+    terms = query.split()
+    if not any(len(term) >= MIN_TERM_LENGTH for term in terms):
+        return None
+    return terms
+
+
+def search_report_data(queryset, terms):
+    """Narrow ``queryset`` to rows matching every term, best matches first.
+
+    On SQLite the longer terms are matched as substrings through the FTS5
+    index and ranked with bm25; shorter ones then filter the matched rows.
+    Other backends fall back to icontains filters, newest rows first.
+    """
+    alias = shard_querysets(queryset)[0].db
+    if connections[alias].vendor != 'sqlite':
+        return queryset.filter(reduce(and_, map(_contains_any, terms))).order_by('-updated_at', '-id')
+
+    indexed = [term for term in terms if len(term) >= MIN_TERM_LENGTH]
+    short = [term for term in terms if len(term) < MIN_TERM_LENGTH]
+    queryset = queryset.filter(search__document__match=' '.join(map(_phrase, indexed)))
+    if short:
+        queryset = queryset.filter(reduce(and_, map(_contains_any, short)))
+    # bm25 scores are negative, better matches lower
+    return queryset.annotate(rank=F('search__rank')).order_by('rank', '-id')
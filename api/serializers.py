@@ -1,6 +1,13 @@
+from contextlib import ExitStack
+
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from django.contrib.auth import authenticate
-from .models import CustomUser, Report, ReportData
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from .fieldsets import SparseFieldsetMixin
+from .models import CustomUser, Job, Report, ReportData
+from .scoping import scoped_report
+from .sharding import shard_for_county, sharded, sharding_enabled
 
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
@@ -24,7 +31,7 @@ class LoginSerializer(serializers.Serializer):
 
         return data
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = [
@@ -63,11 +70,53 @@ class UserCreateSerializer(serializers.ModelSerializer):
         
         return user
 
-class ReportDataSerializer(serializers.ModelSerializer):
-    report_title = serializers.CharField(source='report.title', read_only=True)
-    county = serializers.CharField(source='report.county', read_only=True)
-    sublocation = serializers.CharField(source='report.sublocation', read_only=True)
+class UserProvisionListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        # Usernames are checked for the whole batch in one query, not per row
+        usernames = [entry['username'] for entry in attrs if entry.get('username')]
+        duplicates = {name for name in usernames if usernames.count(name) > 1}
+        taken = set(CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True))
+        if duplicates or taken:
+            raise serializers.ValidationError({'username': f'Already in use: {", ".join(sorted(duplicates | taken))}.'})
+        return attrs
+
+class UserProvisionSerializer(serializers.ModelSerializer):
+    """One agent or supervisor in a bulk provisioning batch"""
+    role = serializers.ChoiceField(choices=[('agent', 'Agent'), ('supervisor', 'Supervisor')])
+    password = serializers.CharField(write_only=True, required=False)
     
+    class Meta:
+        model = CustomUser
+        list_serializer_class = UserProvisionListSerializer
+        fields = [
+            'id', 'username', 'email', 'first_name', 'last_name', 
+            'role', 'county', 'sublocation', 'phone_number', 
+            'password', 'employee_id'
+        ]
+        read_only_fields = ['employee_id']
+        extra_kwargs = {
+            # The batch checks uniqueness in one query; keep only the format check
+            'username': {'required': False, 'validators': [CustomUser.username_validator]},
+        }
+
+class ReportDataListSerializer(serializers.ListSerializer):
+    def create(self, validated_data):
+        # Group rows by report so each report gets one block insert
+        by_report = {}
+        for item in validated_data:
+            by_report.setdefault(item['report'], []).append(item)
+
+        # Open the transaction on every database the rows go to, not just default
+        aliases = {router.db_for_write(ReportData, instance=report) or DEFAULT_DB_ALIAS for report in by_report}
+        created = []
+        with ExitStack() as stack:
+            for alias in sorted(aliases):
+                stack.enter_context(transaction.atomic(using=alias))
+            for report, items in by_report.items():
+                created.extend(ReportData.bulk_create_for_report(report, items))
+        return created
+
+class ReportDataSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ReportData
         fields = [
@@ -76,10 +125,23 @@ class ReportDataSerializer(serializers.ModelSerializer):
             'status', 'is_active', 'agent_feedback', 'supervisor_feedback',
             'county', 'sublocation', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['entry_number', 'is_active', 'created_at', 'updated_at']
+        read_only_fields = [
+            'entry_number', 'is_active', 'county', 'sublocation', 'report_title', 'created_at', 'updated_at'
+        ]
+        list_serializer_class = ReportDataListSerializer
 
-class ReportSerializer(serializers.ModelSerializer):
-    data_rows = ReportDataSerializer(many=True, read_only=True)
+    def get_fields(self):
+        fields = super().get_fields()
+        # Bulk inserts resolve the parent report once instead of once per row
+        if 'report' in self.context:
+            fields['report'] = serializers.PrimaryKeyRelatedField(read_only=True)
+        elif sharding_enabled() and 'report' in fields:
+            # Look the parent report up on the shard its primary key names
+            fields['report'].queryset = sharded(Report.objects.all())
+        return fields
+
+class ReportSummarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Report without its data rows, for list views"""
     assigned_to_name = serializers.CharField(source='assigned_to.get_full_name', read_only=True)
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
     
@@ -89,13 +151,26 @@ class ReportSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'status', 'county', 'sublocation',
             'assigned_to', 'assigned_to_name', 'created_by', 'created_by_name',
             'total_entries', 'active_rate', 'completion_rate', 'manager_feedback',
-            'created_at', 'updated_at', 'data_rows'
+            'created_at', 'updated_at'
         ]
         read_only_fields = [
             'created_by', 'created_by_name', 'total_entries', 
             'active_rate', 'completion_rate', 'created_at', 'updated_at'
         ]
 
+    def validate_county(self, value):
+        # A report stays on the shard it was created on, so it may not move off it
+        if self.instance is not None and sharding_enabled() and value != self.instance.county:
+            if shard_for_county(value) != self.instance._state.db:
+                raise serializers.ValidationError('Reports cannot move to a county on another shard.')
+        return value
+
+class ReportSerializer(ReportSummarySerializer):
+    data_rows = ReportDataSerializer(many=True, read_only=True)
+    
+    class Meta(ReportSummarySerializer.Meta):
+        fields = ReportSummarySerializer.Meta.fields + ['data_rows']
+
 class ReportCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Report
@@ -104,6 +179,47 @@ class ReportCreateSerializer(serializers.ModelSerializer):
             'assigned_to', 'manager_feedback'
         ]
 
+class ReportDataFilterSerializer(serializers.Serializer):
+    """Field values that select report data rows for a bulk update"""
+    report_id = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(choices=ReportData.STATUS_CHOICES, required=False)
+    county = serializers.ChoiceField(choices=CustomUser.COUNTY_CHOICES, required=False)
+    sublocation = serializers.ChoiceField(choices=CustomUser.SUBLOCATION_CHOICES, required=False)
+    service_type = serializers.ChoiceField(choices=ReportData._meta.get_field('service_type').choices, required=False)
+    priority = serializers.ChoiceField(choices=ReportData._meta.get_field('priority').choices, required=False)
+    
+    def to_internal_value(self, data):
+        if isinstance(data, dict):
+            unknown = sorted(set(data) - set(self.fields))
+            if unknown:
+                raise serializers.ValidationError(f'Cannot filter on: {", ".join(unknown)}.')
+        value = super().to_internal_value(data)
+        if not value:
+            raise serializers.ValidationError('Give at least one field to filter on.')
+        return value
+
+class ReportDataBulkUpdateSerializer(serializers.Serializer):
+    """Select report data rows by id or by filter and the changes to apply to them"""
+    CHANGE_FIELDS = ('status', 'agent_feedback', 'supervisor_feedback')
+    MAX_IDS = 5000
+    
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False, max_length=MAX_IDS)
+    filter = ReportDataFilterSerializer(required=False)
+    status = serializers.ChoiceField(choices=ReportData.STATUS_CHOICES, required=False)
+    agent_feedback = serializers.CharField(required=False, allow_blank=True)
+    supervisor_feedback = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, data):
+        if 'ids' not in data and 'filter' not in data:
+            raise serializers.ValidationError('Select rows with ids or filter.')
+        if not any(name in data for name in self.CHANGE_FIELDS):
+            raise serializers.ValidationError(f'Nothing to change; send one of {", ".join(self.CHANGE_FIELDS)}.')
+        return data
+    
+    @property
+    def changes(self):
+        return {name: self.validated_data[name] for name in self.CHANGE_FIELDS if name in self.validated_data}
+
 # Statistics serializers
 class CountyStatsSerializer(serializers.Serializer):
     county = serializers.CharField()
@@ -125,5 +241,47 @@ class ManagerStatisticsSerializer(serializers.Serializer):
     user_stats = UserStatsSerializer()
     report_stats = ReportStatsSerializer()
     county_stats = CountyStatsSerializer(many=True)
-    recent_reports = ReportSerializer(many=True)
-    recent_users = UserSerializer(many=True)
\ No newline at end of file
+    recent_reports = ReportSummarySerializer(many=True)
+    recent_users = UserSerializer(many=True)
+
+class JobSerializer(serializers.ModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name='job-detail')
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'url', 'kind', 'params', 'status', 'progress', 'message',
+            'result', 'error', 'download_url', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = [
+            'status', 'progress', 'message', 'result', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+    
+    def get_download_url(self, obj):
+        if not obj.result_file:
+            return None
+        return reverse('job-download', args=[obj.pk], request=self.context.get('request'))
+    
+    def validate(self, data):
+        kind = data['kind']
+        params = data.get('params') or {}
+        user = self.context['request'].user
+        if not isinstance(params, dict):
+            raise serializers.ValidationError({'params': 'Must be an object.'})
+        if kind == 'rebuild_stats' and user.role != 'manager':
+            raise serializers.ValidationError({'kind': 'Only managers can rebuild statistics.'})
+        if kind == 'export' and params.get('export_format', 'xlsx') not in ('xlsx', 'csv'):
+            raise serializers.ValidationError({'params': 'export_format must be xlsx or csv.'})
+        if kind in ('import', 'import_file'):
+            if not params.get('report_id'):
+                raise serializers.ValidationError({'params': 'report_id is required.'})
+            try:
+                scoped_report(user, params['report_id'])
+            except (Report.DoesNotExist, TypeError, ValueError):
+                raise serializers.ValidationError({'params': 'Report not found.'})
+            if kind == 'import' and not isinstance(params.get('entries'), list):
+                raise serializers.ValidationError({'params': 'entries must be a list.'})
+        return data
+
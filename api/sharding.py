@@ -0,0 +1,282 @@
+import asyncio
+from itertools import chain
+
+from django.conf import settings
+from django.core.checks import Error
+from django.core.exceptions import ImproperlyConfigured, MultipleObjectsReturned
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.db.models import AutoField, QuerySet
+
+# Models whose rows live on the shard of their county
+SHARDED_MODELS = {'report', 'reportdata', 'reportentrysequence', 'reportrollup', 'tombstone'}
+
+# Each shard hands out primary keys from its own range, so a pk names its shard
+SHARD_ID_BITS = 40
+
+
+def shard_aliases():
+    return list(getattr(settings, 'SHARD_DATABASES', []))
+
+
+def sharding_enabled():
+    return bool(shard_aliases())
+
+
+def data_aliases():
+    """Database aliases holding report data: every shard, or just default"""
+    return shard_aliases() or [DEFAULT_DB_ALIAS]
+
+
+def shard_for_county(county):
+    aliases = shard_aliases()
+    overrides = getattr(settings, 'COUNTY_SHARDS', {})
+    if county in overrides:
+        return overrides[county]
+    from .models import CustomUser
+    counties = [value for value, _ in CustomUser.COUNTY_CHOICES]
+    index = counties.index(county) if county in counties else 0
+    return aliases[index % len(aliases)]
+
+
+def shard_for_pk(pk):
+    aliases = shard_aliases()
+    index = int(pk) >> SHARD_ID_BITS
+    if not 0 <= index < len(aliases):
+        raise ValueError(f'{pk} does not belong to any shard')
+    return aliases[index]
+
+
+def sharded(queryset, county=None):
+    """Bind ``queryset`` to the shard of ``county``, or fan it out over every shard"""
+    aliases = shard_aliases()
+    if not aliases:
+        return queryset
+    if county:
+        return queryset.using(shard_for_county(county))
+    return ShardedQuerySet(queryset.using(alias) for alias in aliases)
+
+
+def for_pk(queryset, pk):
+    """Bind ``queryset`` to the shard holding primary key ``pk``"""
+    if not sharding_enabled():
+        return queryset
+    return queryset.using(shard_for_pk(pk))
+
+
+def shard_querysets(queryset):
+    """The per-database querysets behind a possibly sharded queryset"""
+    if isinstance(queryset, ShardedQuerySet):
+        return queryset.querysets
+    return [queryset]
+
+
+def load_report_users(queryset):
+    """Load the assigned and creating users of reports with the fewest queries.
+
+    Users stay on the default database when sharding, so they cannot be
+    joined and are prefetched instead.
+    """
+    if sharding_enabled():
+        return queryset.prefetch_related('assigned_to', 'created_by')
+    return queryset.select_related('assigned_to', 'created_by')
+
+
+class ShardRoutedQuerySet(QuerySet):
+    """QuerySet whose create() lets the router place the new row by its county"""
+
+    def create(self, **kwargs):
+        if self._db is not None or not sharding_enabled():
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True, using=router.db_for_write(self.model, instance=obj))
+        return obj
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+def _sort_value(row, name):
+    if isinstance(row, dict):
+        return row[name]
+    return getattr(row, name)
+
+
+class ShardedQuerySet:
+    """Fan a queryset out over every shard and merge the results.
+
+    Supports the part of the QuerySet API the views use: chaining methods
+    are applied to each shard's queryset, and reads merge the shard results
+    in the queryset's ordering.
+    """
+
+    def __init__(self, querysets, window=None):
+        self.querysets = list(querysets)
+        self.model = self.querysets[0].model
+        # (start, stop) of a slice, applied after merging
+        self.window = window
+
+    @property
+    def query(self):
+        return self.querysets[0].query
+
+    @property
+    def db(self):
+        return None
+
+    def using(self, alias):
+        # Every shard queryset is already bound to its own alias
+        return self
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = getattr(self.querysets[0], name)
+        if not callable(method):
+            raise AttributeError(name)
+
+        def fan_out(*args, **kwargs):
+            if self.window is not None:
+                raise TypeError('Cannot chain onto a sliced sharded queryset')
+            results = [getattr(queryset, name)(*args, **kwargs) for queryset in self.querysets]
+            if not all(isinstance(result, QuerySet) for result in results):
+                raise TypeError(f'{name}() cannot be fanned out across shards')
+            return ShardedQuerySet(results)
+        return fan_out
+
+    def _merge(self, shard_rows):
+        rows = list(chain.from_iterable(shard_rows))
+        ordering = [field for field in self.query.order_by if isinstance(field, str)]
+        if not rows or isinstance(rows[0], tuple):
+            return rows
+        # Stable sorts from the last key to the first give the full ordering
+        for field in reversed(ordering):
+            name = field.lstrip('-')
+            if name == 'pk':
+                name = self.model._meta.pk.attname
+            rows.sort(key=lambda row, name=name: _sort_value(row, name), reverse=field.startswith('-'))
+        return rows
+
+    def _shard_querysets(self):
+        if self.window is None or self.window[1] is None:
+            return self.querysets
+        # Each shard contributes at most `stop` rows to the merged slice
+        return [queryset[:self.window[1]] for queryset in self.querysets]
+
+    def _rows(self, shard_rows):
+        rows = self._merge(shard_rows)
+        if self.window is not None:
+            rows = rows[self.window[0]:self.window[1]]
+        return rows
+
+    def __iter__(self):
+        return iter(self._rows(list(queryset) for queryset in self._shard_querysets()))
+
+    async def _aiter(self):
+        shard_rows = await asyncio.gather(*(
+            _alist(queryset) for queryset in self._shard_querysets()
+        ))
+        for row in self._rows(shard_rows):
+            yield row
+
+    def __aiter__(self):
+        return self._aiter()
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def __bool__(self):
+        return self.exists()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return list(self[key:key + 1])[0]
+        if key.step is not None or self.window is not None:
+            raise ValueError('Sharded querysets support a single slice without a step')
+        return ShardedQuerySet(self.querysets, (key.start or 0, key.stop))
+
+    def iterator(self, chunk_size=None):
+        return chain.from_iterable(
+            queryset.iterator(chunk_size=chunk_size) if chunk_size else queryset.iterator()
+            for queryset in self.querysets
+        )
+
+    def count(self):
+        if self.window is not None:
+            return len(self)
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def exists(self):
+        return any(queryset.exists() for queryset in self.querysets)
+
+    def first(self):
+        rows = list(self[:1])
+        return rows[0] if rows else None
+
+    def update(self, **kwargs):
+        return sum(queryset.update(**kwargs) for queryset in self.querysets)
+
+    def get(self, *args, **kwargs):
+        candidates = self.querysets
+        pk = kwargs.get('pk', kwargs.get('id'))
+        if pk is not None and not args:
+            try:
+                alias = shard_for_pk(pk)
+                candidates = [queryset for queryset in self.querysets if queryset.db == alias]
+            except (TypeError, ValueError):
+                pass
+
+        found = []
+        for queryset in candidates:
+            try:
+                found.append(queryset.get(*args, **kwargs))
+            except self.model.DoesNotExist:
+                continue
+        if not found:
+            raise self.model.DoesNotExist(f'{self.model._meta.object_name} matching query does not exist.')
+        if len(found) > 1:
+            raise MultipleObjectsReturned(f'get() returned more than one {self.model._meta.object_name}')
+        return found[0]
+
+
+def seed_shard_sequences(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """post_migrate: start each shard's primary keys at the base of its range.
+
+    Covers every sharded model with an auto-incrementing key. Only SQLite
+    shards can be seeded; check_shard_backends refuses to start with others.
+    """
+    if using not in shard_aliases():
+        return
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        raise ImproperlyConfigured(f'Shard {using!r} uses {connection.vendor}; only SQLite shards are supported')
+    base = shard_aliases().index(using) << SHARD_ID_BITS
+    if not base:
+        return
+    models = [
+        model for model in sender.get_models()
+        if model._meta.model_name in SHARDED_MODELS and isinstance(model._meta.pk, AutoField)
+    ]
+    with connection.cursor() as cursor:
+        for model in models:
+            table = model._meta.db_table
+            cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s', [table])
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, base])
+            elif row[0] < base:
+                cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s', [base, table])
+
+
+def check_shard_backends(app_configs, **kwargs):
+    """System check: shards must be SQLite, the only backend whose key ranges are seeded"""
+    errors = []
+    for alias in shard_aliases():
+        vendor = connections[alias].vendor
+        if vendor != 'sqlite':
+            errors.append(Error(
+                f'Shard {alias!r} uses the {vendor} backend.',
+                hint='Primary key ranges are only seeded on SQLite shards.',
+                obj=alias, id='api.E001',
+            ))
+    return errors
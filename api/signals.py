@@ -0,0 +1,54 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user
+from .caching import invalidate_on_commit
+from .models import CustomUser, Report, ReportData, Tombstone
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_for_user(sender, using=None, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no cached payload includes
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_on_commit(using)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def forget_cached_user(sender, instance, update_fields=None, **kwargs):
+    # Role, scope, activity or password changes must reach cached users
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=Report)
+@receiver(post_delete, sender=Report)
+@receiver(post_save, sender=ReportData)
+@receiver(post_delete, sender=ReportData)
+def invalidate_for_report(sender, using=None, **kwargs):
+    invalidate_on_commit(using)
+
+
+@receiver(post_delete, sender=Report)
+def tombstone_report(sender, instance, using=None, **kwargs):
+    Tombstone.objects.using(using).create(
+        kind='report', object_id=instance.pk, county=instance.county, assigned_to_id=instance.assigned_to_id
+    )
+
+
+@receiver(post_delete, sender=ReportData)
+def tombstone_report_data(sender, instance, using=None, origin=None, **kwargs):
+    # Rows deleted by a cascade go with their report, whose tombstone covers them
+    if not (isinstance(origin, ReportData) or getattr(origin, 'model', None) is ReportData):
+        return
+    assigned_to_id = Report.objects.using(using).filter(pk=instance.report_id).values_list(
+        'assigned_to_id', flat=True
+    ).first()
+    if assigned_to_id is None:
+        return
+    Tombstone.objects.using(using).create(
+        kind='reportdata', object_id=instance.pk, county=instance.county, assigned_to_id=assigned_to_id
+    )
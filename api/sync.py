@@ -0,0 +1,134 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+from urllib import parse
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.response import Response
+
+from .models import Tombstone
+from .sharding import sharded
+
+# Rows touched this close to the end of a sync are sent again next time, so a
+# write committed just after the feed was read (or still in flight to the
+# replica) is never skipped. Clients apply rows as idempotent upserts.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+MAX_SYNC_PAGE_SIZE = 1000
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'The sync token is older than the kept deletions; sync again without since.'
+    default_code = 'sync_token_expired'
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30))
+
+
+def encode_token(updated_at, pk=0):
+    tokens = {'u': updated_at.isoformat(), 'i': pk}
+    return urlsafe_b64encode(parse.urlencode(tokens).encode('ascii')).decode('ascii')
+
+
+def decode_token(token):
+    """Return the (updated_at, id) position a sync token stands for"""
+    try:
+        tokens = parse.parse_qs(urlsafe_b64decode(token.encode('ascii')).decode('ascii'))
+        updated_at = parse_datetime(tokens['u'][0])
+        pk = int(tokens['i'][0])
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise ParseError('Invalid sync token')
+    if updated_at is None:
+        raise ParseError('Invalid sync token')
+    return updated_at, pk
+
+
+def scoped_tombstones(user, kind):
+    """Tombstones of ``kind`` for rows that were visible to ``user``"""
+    queryset = Tombstone.objects.filter(kind=kind)
+    if user.role == 'agent':
+        return sharded(queryset.filter(assigned_to=user))
+    elif user.role == 'supervisor':
+        return sharded(queryset.filter(county=user.county), county=user.county)
+    elif user.role == 'manager':
+        return sharded(queryset)
+    return Tombstone.objects.none()
+
+
+def read_changes(queryset, tombstones, since, limit):
+    """Read one page of the change feed after the ``since`` token.
+
+    Rows come in (updated_at, id) order from the indexed column, at most
+    ``limit`` of them. Returns the rows, the ids deleted over the same span,
+    the token to continue from and whether more rows are waiting. Without
+    ``since`` the feed starts from the beginning, which is a full sync and
+    needs no deletions. Ids still visible through ``queryset`` are not
+    reported deleted; their tombstones record a move out of someone else's
+    scope.
+    """
+    started = timezone.now()
+    if since:
+        updated_at, pk = decode_token(since)
+        if updated_at < started - tombstone_retention():
+            raise SyncTokenExpired()
+        queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk))
+        tombstones = tombstones.filter(deleted_at__gte=updated_at)
+    else:
+        tombstones = tombstones.none()
+
+    rows = list(queryset.order_by('updated_at', 'id')[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if more:
+        last = rows[-1]
+        token = encode_token(last.updated_at, last.pk)
+        tombstones = tombstones.filter(deleted_at__lte=last.updated_at)
+    else:
+        token = encode_token(started - SYNC_OVERLAP)
+    deleted = {pk for pk in tombstones.values_list('object_id', flat=True)}
+    if deleted:
+        deleted -= set(queryset.filter(id__in=deleted).order_by().values_list('id', flat=True))
+    return rows, sorted(deleted), token, more
+
+
+class ChangeFeedMixin:
+    """Viewset mixin adding a compact ``changes`` feed for delta sync.
+
+    ``GET changes/?since=<token>`` answers with the rows created or updated
+    since the token as value lists under ``fields``, and the ids deleted
+    since then. Clients apply ``rows`` and then ``deleted``, store ``token``
+    for the next call and keep calling while ``more`` is true. Rows of a
+    deleted report are not listed separately; they go with the report.
+    """
+    tombstone_kind = None
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        try:
+            limit = int(request.query_params.get('page_size', MAX_SYNC_PAGE_SIZE))
+        except ValueError:
+            limit = MAX_SYNC_PAGE_SIZE
+        limit = max(1, min(limit, MAX_SYNC_PAGE_SIZE))
+
+        rows, deleted, token, more = read_changes(
+            self.filter_queryset(self.get_queryset()),
+            scoped_tombstones(request.user, self.tombstone_kind),
+            request.query_params.get('since'),
+            limit,
+        )
+        serializer = self.get_serializer(rows, many=True)
+        fields = [name for name, field in serializer.child.fields.items() if not field.write_only]
+        return Response({
+            'token': token,
+            'more': more,
+            'fields': fields,
+            'rows': [[row[name] for name in fields] for row in serializer.data],
+            'deleted': deleted,
+        })
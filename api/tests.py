@@ -1,3 +1,851 @@
-from django.test import TestCase
+import io
+import json
+import re
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection, connections, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from global_gmt_backend.sqlite_backend.base import DatabaseWrapper, writer_lock
+
+from .authentication import check_user_cache, issue_token
+from .caching import cached_response
+from .imports import SpreadsheetReader, import_rows
+from .jobs import run_job
+from .models import CustomUser, Job, Report, ReportData, ReportRollup
+from .routers import replica_reads, replica_reads_active
+from .search import check_search_triggers
+from .sharding import SHARD_ID_BITS, ShardedQuerySet, check_shard_backends, for_pk, shard_for_pk
+
+# A plain "SCAN <table>" line (or "SCAN TABLE <table>" before SQLite 3.36)
+# means SQLite reads the whole table without an index
+FULL_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)$')
+
+
+class ApiTestCase(TestCase):
+    """Two reports, in Nairobi and Nakuru, with one row in each status"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = CustomUser.objects.create_user(
+            username='manager', password='pass', role='manager', county='nairobi', sublocation='central'
+        )
+        cls.supervisor = CustomUser.objects.create_user(
+            username='supervisor', password='pass', role='supervisor', county='nakuru', sublocation='east'
+        )
+        cls.agent = CustomUser.objects.create_user(
+            username='agent', password='pass', role='agent', county='nakuru', sublocation='east'
+        )
+        for county in ('nairobi', 'nakuru'):
+            report = Report.objects.create(
+                title=f'{county} survey', description='Survey', county=county, sublocation='east',
+                assigned_to=cls.agent, created_by=cls.manager
+            )
+            for status in ('pending', 'in_progress', 'completed'):
+                ReportData.objects.create(
+                    report=report, customer_name='Customer', customer_phone='0700000000',
+                    location='Town', service_type='repair', priority='low', status=status
+                )
+        cls.report = report
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+
+class CounterTests(ApiTestCase):
+
+    def assertCountersMatchRows(self, report):
+        report.refresh_from_db()
+        rows = ReportData.objects.filter(report=report)
+        total = rows.count()
+        active = rows.filter(is_active=True).count()
+        completed = rows.filter(status='completed').count()
+        self.assertEqual(
+            (report.total_entries, report.active_count, report.completed_count),
+            (total, active, completed),
+        )
+        self.assertAlmostEqual(float(report.completion_rate), completed * 100 / total if total else 0, places=1)
+
+    def test_row_writes_adjust_counters(self):
+        self.assertCountersMatchRows(self.report)
+        row = ReportData.objects.filter(report=self.report, status='pending').get()
+        row.status = 'completed'
+        row.save()
+        self.assertCountersMatchRows(self.report)
+        row.delete()
+        self.assertCountersMatchRows(self.report)
+
+    def test_moving_a_row_moves_its_counts(self):
+        other = Report.objects.exclude(pk=self.report.pk).get()
+        row = ReportData.objects.filter(report=self.report, status='completed').get()
+        row.report = other
+        row.save()
+        self.assertCountersMatchRows(self.report)
+        self.assertCountersMatchRows(other)
+
+    def test_stale_in_memory_row_does_not_skew_counters(self):
+        row = ReportData.objects.filter(report=self.report, status='pending').get()
+        fresh = ReportData.objects.get(pk=row.pk)
+        fresh.status = 'completed'
+        fresh.save()
+        # ``row`` still believes it is pending; its save must start from the stored state
+        row.status = 'in_progress'
+        row.save()
+        self.assertCountersMatchRows(self.report)
+
+    def test_update_fields_count_only_what_is_written(self):
+        row = ReportData.objects.filter(report=self.report, status='pending').get()
+        row.status = 'completed'
+        row.agent_feedback = 'Called back'
+        # The status change stays in memory, so the counters must not see it
+        row.save(update_fields=['agent_feedback'])
+        self.assertEqual(ReportData.objects.get(pk=row.pk).status, 'pending')
+        self.assertCountersMatchRows(self.report)
+        row.save(update_fields=['status'])
+        self.assertEqual(ReportData.objects.get(pk=row.pk).status, 'completed')
+        self.assertCountersMatchRows(self.report)
+
+
+class BulkCreateTests(ApiTestCase):
+    URL = '/api/report-data/bulk_create/'
+
+    def entries(self, count, **extra):
+        return [
+            {'customer_name': f'Customer {n}', 'customer_phone': '0700000000', 'location': 'Town',
+             'service_type': 'repair', 'priority': 'low', **extra}
+            for n in range(count)
+        ]
+
+    def post(self, entries):
+        self.client.force_authenticate(self.manager)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(self.URL, {'report_id': self.report.id, 'entries': entries}, format='json')
+        return response, len(captured)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        response, few = self.post(self.entries(2))
+        self.assertEqual(response.status_code, 201)
+        response, many = self.post(self.entries(40, status='completed'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(few, many)
+        self.report.refresh_from_db()
+        self.assertEqual((self.report.total_entries, self.report.completed_count), (45, 41))
+
+    def test_one_bad_entry_rejects_the_batch(self):
+        response, _ = self.post(self.entries(3) + [{'customer_name': 'No phone'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ReportData.objects.filter(report=self.report).count(), 3)
+
+    def test_reports_out_of_scope_are_not_found(self):
+        nairobi = Report.objects.get(county='nairobi')
+        self.client.force_authenticate(self.supervisor)
+        response = self.client.post(self.URL, {'report_id': nairobi.id, 'entries': self.entries(1)}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(ReportData.objects.filter(report=nairobi).count(), 3)
+
+
+class EntryNumberTests(ApiTestCase):
+
+    def test_numbers_continue_per_report_across_single_and_bulk_inserts(self):
+        row = ReportData.objects.create(
+            report=self.report, customer_name='Next', customer_phone='0700000000', location='Town',
+            service_type='repair', priority='low',
+        )
+        self.assertEqual(row.entry_number, f'{self.report.id}-ENT-0004')
+        rows = ReportData.bulk_create_for_report(self.report, [
+            {'customer_name': name, 'customer_phone': '0700000000', 'location': 'Town',
+             'service_type': 'repair', 'priority': 'low'}
+            for name in ('A', 'B')
+        ])
+        self.assertEqual(
+            [row.entry_number for row in rows], [f'{self.report.id}-ENT-0005', f'{self.report.id}-ENT-0006']
+        )
+
+    def test_reservations_never_overlap(self):
+        first = ReportData.reserve_entry_numbers(self.report.id, 10)
+        second = ReportData.reserve_entry_numbers(self.report.id, 1)
+        self.assertEqual(second, first + 10)
+
+
+class ExportTests(ApiTestCase):
+    URL = '/api/report-data/export_excel/'
+
+    def test_csv_export_streams_the_visible_rows(self):
+        self.client.force_authenticate(self.supervisor)
+        response = self.client.get(self.URL, {'export_format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        # A header and the three Nakuru rows only
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(all(f'{self.report.id}-ENT-' in line for line in lines[1:]))
+
+    def test_xlsx_export_is_a_workbook(self):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        workbook = load_workbook(io.BytesIO(content), read_only=True)
+        # A header and all six rows
+        self.assertEqual(len(list(workbook.worksheets[0].iter_rows())), 7)
+
+
+class PaginationTests(ApiTestCase):
+
+    def test_cursor_pages_cover_every_row_once(self):
+        self.client.force_authenticate(self.manager)
+        seen = []
+        url = '/api/report-data/?page_size=4'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, sorted(ReportData.objects.values_list('id', flat=True), reverse=True))
+
+    def test_rows_added_while_paging_do_not_shift_pages(self):
+        self.client.force_authenticate(self.manager)
+        first = self.client.get('/api/report-data/?page_size=3')
+        ReportData.objects.create(
+            report=self.report, customer_name='Late', customer_phone='0700000000', location='Town',
+            service_type='repair', priority='low',
+        )
+        second = self.client.get(first.data['next'])
+        ids = [row['id'] for row in first.data['results'] + second.data['results']]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), 6)
+
+    def test_bad_cursor_is_not_found(self):
+        self.client.force_authenticate(self.manager)
+        self.assertEqual(self.client.get('/api/reports/?cursor=nonsense').status_code, 404)
+
+
+class ReportRepresentationTests(ApiTestCase):
+
+    def test_list_leaves_out_data_rows_unless_asked(self):
+        self.client.force_authenticate(self.manager)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/reports/')
+        self.assertNotIn('data_rows', response.data['results'][0])
+        self.assertFalse([query for query in captured if 'api_reportdata' in query['sql']])
+
+        response = self.client.get('/api/reports/?include=data_rows')
+        self.assertEqual(len(response.data['results'][0]['data_rows']), 3)
+
+    def test_detail_embeds_data_rows(self):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get(f'/api/reports/{self.report.id}/')
+        self.assertEqual(len(response.data['data_rows']), 3)
+
+
+class SparseFieldsetTests(ApiTestCase):
+
+    def test_fields_and_omit_pick_the_returned_fields(self):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get('/api/report-data/?fields=id,status')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'status'})
+        response = self.client.get('/api/reports/?omit=description,manager_feedback')
+        self.assertNotIn('description', response.data['results'][0])
+        self.assertIn('title', response.data['results'][0])
+
+    def test_narrow_fieldsets_select_fewer_columns(self):
+        self.client.force_authenticate(self.manager)
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get('/api/report-data/?fields=id,status')
+        sql = next(query['sql'] for query in captured if 'FROM "api_reportdata"' in query['sql'])
+        self.assertNotIn('customer_name', sql)
+
+    def test_writes_ignore_fieldsets(self):
+        self.client.force_authenticate(self.manager)
+        response = self.client.post('/api/report-data/?fields=id', {
+            'report': self.report.id, 'customer_name': 'New', 'customer_phone': '0700000000',
+            'location': 'Town', 'service_type': 'repair', 'priority': 'low',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertIn('customer_name', response.data)
+
+
+class RollupTests(ApiTestCase):
+    FIELDS = ('county', 'sublocation', 'status', 'day', 'report_count', 'total_entries',
+              'active_entries', 'completed_entries', 'active_rate_sum')
+
+    def snapshot(self):
+        return set(ReportRollup.objects.filter(report_count__gt=0).values_list(*self.FIELDS))
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        self.report.status = 'completed'
+        self.report.county = 'kisumu'
+        self.report.save()
+        row = ReportData.objects.filter(report=self.report, status='pending').get()
+        row.status = 'completed'
+        row.save()
+        Report.objects.exclude(pk=self.report.pk).get().delete()
+
+        incremental = self.snapshot()
+        ReportRollup.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_manager_statistics_come_from_rollups(self):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get('/api/api/manager-statistics/')
+        self.assertEqual(response.data['report_stats']['total_reports'], 2)
+        self.assertEqual({row['county'] for row in response.data['county_stats']}, {'nairobi', 'nakuru'})
+
+
+class CachingTests(ApiTestCase):
+    URL = '/api/api/manager-statistics/'
+
+    def test_etag_revalidation_and_invalidation(self):
+        self.client.force_authenticate(self.manager)
+        first = self.client.get(self.URL)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ReportData.objects.filter(report=self.report).first().delete()
+        second = self.client.get(self.URL, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+    def test_misses_are_built_from_the_primary(self):
+        seen = []
+
+        def build():
+            seen.append(replica_reads_active())
+            return {}
+
+        request = Request(APIRequestFactory().get('/'))
+        with mock.patch('api.routers.replica_configured', return_value=True), replica_reads():
+            cached_response(request, 'test', build)
+            self.assertTrue(replica_reads_active())
+        self.assertEqual(seen, [False])
+
+
+class AnalyticsTests(ApiTestCase):
+    URL = '/api/api/analytics/'
+
+    def test_trends_are_bucketed_per_county(self):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['interval'], 'day')
+        self.assertEqual({row['county'] for row in response.data['results']}, {'nairobi', 'nakuru'})
+        self.assertEqual([row['total'] for row in response.data['results']], [3, 3])
+
+    def test_trends_are_scoped_to_the_user(self):
+        self.client.force_authenticate(self.supervisor)
+        response = self.client.get(self.URL, {'interval': 'week'})
+        self.assertEqual([row['county'] for row in response.data['results']], ['nakuru'])
+
+    def test_bad_parameters_are_rejected(self):
+        self.client.force_authenticate(self.manager)
+        for params in ({'interval': 'hour'}, {'county': 'atlantis'}, {'start': 'yesterday'}):
+            self.assertEqual(self.client.get(self.URL, params).status_code, 400)
+
+
+class QueryPlanTests(ApiTestCase):
+    """Fail when a role-scoped endpoint falls back to a full table scan"""
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_full_scan_pattern(self):
+        for line in ('SCAN api_report', 'SCAN TABLE api_report'):
+            self.assertEqual(FULL_SCAN.search(line).group(1), 'api_report')
+        for line in ('SEARCH api_report USING INDEX report_created_idx (created_at<?)',
+                     'SCAN api_report USING INDEX report_created_idx',
+                     'SCAN TABLE api_report USING COVERING INDEX report_created_idx'):
+            self.assertIsNone(FULL_SCAN.search(line), line)
+
+    def assertNoFullScans(self, user, url):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+            # Streaming responses only query the database while being consumed
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, url)
+
+        selects = [query['sql'] for query in captured.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertTrue(selects, url)
+        for sql in selects:
+            plan = self.query_plan(sql)
+            scans = [line for line in plan if FULL_SCAN.search(line)]
+            self.assertEqual(scans, [], f'{url} scans a full table:\n{sql}\n' + '\n'.join(plan))
+
+    def test_agent_endpoints(self):
+        self.assertNoFullScans(self.agent, '/api/reports/')
+        self.assertNoFullScans(self.agent, '/api/report-data/')
+        self.assertNoFullScans(self.agent, f'/api/report-data/?report_id={self.report.id}')
+        self.assertNoFullScans(self.agent, '/api/report-data/changes/')
+        self.assertNoFullScans(self.agent, '/api/report-data/search/?q=customer')
+
+    def test_supervisor_endpoints(self):
+        self.assertNoFullScans(self.supervisor, '/api/reports/')
+        self.assertNoFullScans(self.supervisor, '/api/report-data/')
+        self.assertNoFullScans(self.supervisor, '/api/reports/changes/')
+        self.assertNoFullScans(self.supervisor, '/api/report-data/search/?q=0700')
+        self.assertNoFullScans(self.supervisor, '/api/report-data/export_excel/?export_format=csv')
+        self.assertNoFullScans(self.supervisor, '/api/api/analytics/')
+
+    def test_manager_endpoints(self):
+        self.assertNoFullScans(self.manager, '/api/reports/')
+        self.assertNoFullScans(self.manager, '/api/report-data/')
+        self.assertNoFullScans(self.manager, '/api/report-data/changes/')
+        self.assertNoFullScans(self.manager, '/api/reports/?include=data_rows')
+        self.assertNoFullScans(self.manager, '/api/api/manager-statistics/')
+
+
+class DenormalizedReportFieldsTests(ApiTestCase):
+
+    def test_list_reads_title_without_joining_reports(self):
+        self.client.force_authenticate(self.manager)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/report-data/')
+        self.assertEqual(response.data['results'][0]['report_title'], 'nakuru survey')
+        self.assertFalse([query for query in captured if 'api_report"' in query['sql']])
+
+    def test_editing_a_row_does_not_load_its_report(self):
+        row = ReportData.objects.filter(report=self.report).first()
+        row.agent_feedback = 'Called back'
+        with CaptureQueriesContext(connection) as captured:
+            row.save()
+        self.assertFalse([query for query in captured if 'FROM "api_report"' in query['sql']])
+
+    def test_report_changes_reach_its_rows(self):
+        self.report.title = 'Renamed'
+        self.report.county = 'kisumu'
+        self.report.save()
+        rows = ReportData.objects.filter(report=self.report)
+        self.assertEqual(set(rows.values_list('report_title', 'county')), {('Renamed', 'kisumu')})
+
+
+class WriterLockTests(TestCase):
+
+    ALIAS = 'writer-lock-test'
+
+    def use_database(self, name, **options):
+        settings_dict = dict(connection.settings_dict, NAME=name, OPTIONS=options)
+        wrapper = DatabaseWrapper(settings_dict, alias=self.ALIAS)
+        connections[self.ALIAS] = wrapper
+        self.addCleanup(delattr, connections._connections, self.ALIAS)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_one_reentrant_lock_per_database_file(self):
+        lock = writer_lock('/tmp/a.sqlite3')
+        self.assertIs(writer_lock('/tmp/a.sqlite3'), lock)
+        self.assertIsNot(writer_lock('/tmp/b.sqlite3'), lock)
+        with lock, lock:
+            pass
+
+    def test_transactions_wait_for_the_writer_lock(self):
+        with tempfile.NamedTemporaryFile(suffix='.sqlite3') as db:
+            wrapper = self.use_database(db.name, writer_lock_timeout=0.05)
+            held, release = threading.Event(), threading.Event()
+
+            def hold():
+                with writer_lock(db.name):
+                    held.set()
+                    release.wait()
+
+            thread = threading.Thread(target=hold)
+            thread.start()
+            held.wait()
+            try:
+                with self.assertRaisesMessage(OperationalError, 'writer lock'):
+                    with transaction.atomic(using=self.ALIAS):
+                        pass
+            finally:
+                release.set()
+                thread.join()
+
+            with transaction.atomic(using=self.ALIAS):
+                wrapper.cursor().execute('CREATE TABLE t (id integer)')
+                self.assertIsNotNone(wrapper.holds_writer_lock)
+            self.assertIsNone(wrapper.holds_writer_lock)
+
+
+class ReplicaRoutingTests(ApiTestCase):
+
+    def get_with_replica(self, **headers):
+        with mock.patch('api.routers.replica_configured', return_value=True), \
+                mock.patch('api.routers.replica_reads') as replica_reads:
+            response = self.client.get('/api/report-data/', **headers)
+        self.assertEqual(response.status_code, 200)
+        return replica_reads.called
+
+    def test_token_clients_read_from_the_replica(self):
+        token = issue_token(self.manager)
+        self.assertTrue(self.get_with_replica(HTTP_AUTHORIZATION=f'Bearer {token}'))
+
+    def test_pinned_clients_stay_on_the_primary(self):
+        self.client.force_authenticate(self.manager)
+        self.client.cookies['replica_pin'] = signing.dumps(True, salt='api.replica-pin')
+        with mock.patch('api.middleware.replica_configured', return_value=True):
+            self.assertFalse(self.get_with_replica())
+
+    def test_anonymous_requests_never_reach_the_replica(self):
+        with mock.patch('api.routers.replica_configured', return_value=True), \
+                mock.patch('api.routers.replica_reads') as replica_reads:
+            response = self.client.get('/api/report-data/')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(replica_reads.called)
+
+
+class ShardingTests(ApiTestCase):
+
+    def county_shards(self):
+        # Two disjoint querysets on one database stand in for two shards
+        return ShardedQuerySet(Report.objects.filter(county=county) for county in ('nairobi', 'nakuru'))
+
+    def test_results_merge_in_queryset_order(self):
+        reports = self.county_shards().order_by('-title')
+        self.assertEqual([report.title for report in reports], ['nakuru survey', 'nairobi survey'])
+        self.assertEqual([report.title for report in reports[1:]], ['nairobi survey'])
+        self.assertEqual(reports.count(), 2)
+        self.assertEqual(reports.get(title='nakuru survey'), self.report)
+        with self.assertRaises(TypeError):
+            reports[:1].filter(status='pending')
+
+    @override_settings(SHARD_DATABASES=['s0', 's1'])
+    def test_primary_keys_name_their_shard(self):
+        self.assertEqual(shard_for_pk(7), 's0')
+        self.assertEqual(shard_for_pk((1 << SHARD_ID_BITS) + 7), 's1')
+        self.assertEqual(for_pk(Report.objects.all(), (1 << SHARD_ID_BITS) + 7).db, 's1')
+        with self.assertRaises(ValueError):
+            shard_for_pk(2 << SHARD_ID_BITS)
+
+    def test_only_sqlite_shards_pass_the_check(self):
+        self.assertEqual(check_shard_backends(None), [])
+        with override_settings(SHARD_DATABASES=['default']):
+            self.assertEqual(check_shard_backends(None), [])
+            with mock.patch.object(connection, 'vendor', 'postgresql'):
+                self.assertEqual([error.id for error in check_shard_backends(None)], ['api.E001'])
+
+
+class AsyncEndpointTests(ApiTestCase):
+
+    def test_report_list_matches_the_viewset(self):
+        self.client.force_login(self.supervisor)
+        response = self.client.get('/api/async/reports/')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(set(body), {'next', 'previous', 'results'})
+        self.assertEqual([report['title'] for report in body['results']], ['nakuru survey'])
+        self.assertEqual(body['results'], self.client.get('/api/reports/').data['results'])
+
+    def test_report_data_list_is_scoped(self):
+        self.client.force_login(self.supervisor)
+        results = self.client.get('/api/async/report-data/').json()['results']
+        self.assertEqual(len(results), 3)
+        self.assertEqual({row['county'] for row in results}, {'nakuru'})
+
+    def test_session_login_and_manager_role_are_required(self):
+        self.assertEqual(self.client.get('/api/async/reports/').status_code, 403)
+        self.client.force_login(self.agent)
+        self.assertEqual(self.client.post('/api/async/reports/').status_code, 405)
+        self.assertEqual(self.client.get('/api/async/manager-statistics/').status_code, 403)
+        self.client.force_login(self.manager)
+        response = self.client.get('/api/async/manager-statistics/')
+        self.assertEqual(response.json()['report_stats']['total_reports'], 2)
+
+    def test_api_credentials_are_accepted(self):
+        credentials = {'HTTP_AUTHORIZATION': f'Bearer {issue_token(self.supervisor)}'}
+        response = self.client.get('/api/async/report-data/', **credentials)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertEqual(self.client.get('/api/async/reports/', HTTP_AUTHORIZATION='Bearer forged').status_code, 403)
+
+
+class JobTests(ApiTestCase):
+
+    def test_export_job_runs_to_completion(self):
+        self.client.force_authenticate(self.supervisor)
+        response = self.client.get('/api/report-data/export_excel/', {'export_format': 'csv', 'background': '1'})
+        self.assertEqual(response.status_code, 202)
+        job = Job.claim('test')
+        self.assertEqual(job.pk, response.data['id'])
+        self.assertEqual(run_job(job.pk), 'succeeded')
+        job.refresh_from_db()
+        # The supervisor sees the three Nakuru rows only
+        self.assertEqual(job.result, {'rows': 3})
+        job.result_file.delete()
+
+    def test_claim_reclaims_jobs_whose_lease_lapsed(self):
+        job = Job.objects.create(kind='rebuild_stats', created_by=self.manager)
+        self.assertEqual(Job.claim('worker-a').pk, job.pk)
+        self.assertIsNone(Job.claim('worker-b'))
+
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - Job.lease() - timedelta(seconds=1))
+        reclaimed = Job.claim('worker-b')
+        self.assertEqual((reclaimed.pk, reclaimed.worker), (job.pk, 'worker-b'))
+        self.assertEqual(Job.renew_leases('worker-a', [job.pk]), 0)
+
+    def test_imports_stay_within_the_creators_reports(self):
+        other = CustomUser.objects.create_user(
+            username='other', password='pass', role='agent', county='nakuru', sublocation='east'
+        )
+        params = {'report_id': self.report.id, 'entries': [
+            {'customer_name': 'Jane', 'customer_phone': '0711111111', 'location': 'Town',
+             'service_type': 'repair', 'priority': 'low'},
+        ]}
+        self.client.force_authenticate(other)
+        response = self.client.post('/api/jobs/', {'kind': 'import', 'params': params}, format='json')
+        self.assertEqual(response.status_code, 400)
+        # Jobs queued some other way are checked again when they run
+        job = Job.objects.create(kind='import', params=params, created_by=other)
+        self.assertEqual(run_job(job.pk), 'failed')
+        job.refresh_from_db()
+        self.assertEqual(job.error, 'Report not found')
+        self.assertEqual(ReportData.objects.filter(report=self.report).count(), 3)
+
+
+class ImportTests(ApiTestCase):
+    HEADER = b'customer_name,customer_phone,location,service_type,priority,status\n'
+
+    def upload(self, body, user=None):
+        self.client.force_authenticate(user or self.manager)
+        upload = SimpleUploadedFile('rows.csv', self.HEADER + body, content_type='text/csv')
+        return self.client.post('/api/report-data/import_file/', {'file': upload, 'report_id': self.report.id})
+
+    def test_reports_out_of_scope_are_not_found(self):
+        other = CustomUser.objects.create_user(
+            username='other', password='pass', role='agent', county='nakuru', sublocation='east'
+        )
+        response = self.upload(b'Jane,0711111111,Town,repair,low,\n', user=other)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(ReportData.objects.filter(customer_name='Jane').exists())
+        self.assertEqual(self.upload(b'Jane,0711111111,Town,repair,low,\n', user=self.agent).status_code, 201)
+
+    def test_blank_optional_cells_take_defaults(self):
+        response = self.upload(b'Jane,0711111111,Town,repair,low,\n')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 1)
+        self.assertTrue(ReportData.objects.filter(customer_name='Jane', status='pending').exists())
+
+    def test_blank_required_cells_are_row_errors(self):
+        response = self.upload(b'Jane,,Town,repair,low,\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+        self.assertIn('customer_phone', response.data['errors'][0]['errors'])
+
+    def test_undecodable_row_keeps_earlier_chunks(self):
+        # Past the first block the decoder reads, so the header still decodes
+        good = b'Jane,0711111111,Town,repair,low,\n' * 400
+        body = self.HEADER + good + b'J\xff\xfen,0722222222,Town,repair,low,\n'
+        reader = SpreadsheetReader(io.BytesIO(body), 'csv')
+        summary = import_rows(self.report, reader, chunk_size=100)
+        # Everything decoded before the bad block is kept
+        self.assertTrue(0 < summary['created'] < 400)
+        self.assertEqual(summary['created'], summary['rows'])
+        self.assertIn('could not be read', summary['error'])
+
+
+class BulkUpdateTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.manager)
+
+    def test_filter_updates_rows_and_counters(self):
+        response = self.client.post('/api/report-data/bulk_update/', {
+            'filter': {'report_id': self.report.id, 'status': 'pending'}, 'status': 'completed',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.completed_count, 2)
+
+    def test_bad_filter_values_are_rejected(self):
+        for bad in ({'report_id': 'abc'}, {'status': 'lost'}, {'owner': 'x'}, {}):
+            response = self.client.post('/api/report-data/bulk_update/', {
+                'filter': bad, 'status': 'completed',
+            }, format='json')
+            self.assertEqual(response.status_code, 400, bad)
+
+
+class ChangeFeedTests(ApiTestCase):
+
+    def changes(self, user, url, since=None):
+        self.client.force_authenticate(user)
+        response = self.client.get(url, {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_full_sync_lists_rows_without_deletions(self):
+        ReportData.objects.filter(report=self.report).first().delete()
+        feed = self.changes(self.agent, '/api/report-data/changes/')
+        self.assertEqual(len(feed['rows']), 5)
+        self.assertEqual(feed['deleted'], [])
+
+    def test_delta_sync_reports_deletions(self):
+        token = self.changes(self.agent, '/api/report-data/changes/')['token']
+        row = ReportData.objects.filter(report=self.report).first()
+        row_id = row.id
+        row.delete()
+        feed = self.changes(self.agent, '/api/report-data/changes/', since=token)
+        self.assertEqual(feed['deleted'], [row_id])
+
+    def test_reassigned_report_leaves_old_assignee_feed(self):
+        other = CustomUser.objects.create_user(
+            username='other', password='pass', role='agent', county='nakuru', sublocation='east'
+        )
+        token = self.changes(self.agent, '/api/reports/changes/')['token']
+        manager_token = self.changes(self.manager, '/api/reports/changes/')['token']
+        self.report.assigned_to = other
+        self.report.save()
+
+        feed = self.changes(self.agent, '/api/reports/changes/', since=token)
+        self.assertEqual(feed['deleted'], [self.report.id])
+        self.assertEqual(self.changes(other, '/api/reports/changes/', since=token)['deleted'], [])
+        # Still visible to the manager, so it comes back as a row, not a deletion
+        feed = self.changes(self.manager, '/api/reports/changes/', since=manager_token)
+        self.assertEqual(feed['deleted'], [])
+        ids = [row[feed['fields'].index('id')] for row in feed['rows']]
+        self.assertIn(self.report.id, ids)
+
+
+class SearchTests(ApiTestCase):
+
+    def test_finds_new_and_edited_rows_by_substring(self):
+        row = ReportData.objects.filter(report=self.report).first()
+        row.customer_name = 'Wanjiku Kamau'
+        row.save()
+        self.client.force_authenticate(self.manager)
+        response = self.client.get('/api/report-data/search/', {'q': 'njiku'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['id'] for result in response.data['results']], [row.id])
+
+    def test_check_reports_missing_triggers(self):
+        self.assertEqual(check_search_triggers(None, databases=['default']), [])
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER api_reportdata_fts_update')
+        errors = check_search_triggers(None, databases=['default'])
+        self.assertEqual([error.id for error in errors], ['api.E002'])
+        self.assertIn('api_reportdata_fts_update', errors[0].msg)
+
+
+class ProvisioningTests(ApiTestCase):
+    URL = '/api/users/bulk_create/'
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.manager)
+
+    def test_creates_users_with_generated_ids(self):
+        response = self.client.post(self.URL, [
+            {'role': 'agent', 'county': 'nakuru', 'sublocation': 'east'},
+            {'role': 'supervisor', 'county': 'nakuru', 'sublocation': 'east', 'username': 'sup.two'},
+        ], format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        agent = CustomUser.objects.get(employee_id=response.data[0]['employee_id'])
+        self.assertEqual(agent.username, agent.employee_id)
+        self.assertTrue(agent.check_password(agent.employee_id))
+        self.assertTrue(CustomUser.objects.filter(username='sup.two', role='supervisor').exists())
+
+    def test_rejects_taken_and_malformed_usernames(self):
+        for username in ('agent', 'bad name!'):
+            response = self.client.post(self.URL, [
+                {'role': 'agent', 'county': 'nakuru', 'sublocation': 'east', 'username': username},
+            ], format='json')
+            self.assertEqual(response.status_code, 400, username)
+
+
+class TokenTests(ApiTestCase):
+
+    def bearer(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def test_issued_tokens_authenticate(self):
+        self.client.force_authenticate(self.agent)
+        response = self.client.post('/api/token/')
+        self.assertEqual(response.data['expires_in'], 3600)
+        reply = self.bearer(response.data['token']).get('/api/reports/')
+        self.assertEqual(reply.status_code, 200)
+        self.assertEqual(len(reply.data['results']), 2)
+
+    @override_settings(USER_CACHE_SECONDS=60)
+    def test_password_change_revokes_tokens(self):
+        client = self.bearer(issue_token(self.agent))
+        self.assertEqual(client.get('/api/reports/').status_code, 200)
+        self.agent.set_password('a-new-password')
+        self.agent.save()
+        self.assertEqual(client.get('/api/reports/').status_code, 403)
+
+    def test_expired_and_forged_tokens_are_rejected(self):
+        token = issue_token(self.agent)
+        with override_settings(API_TOKEN_MAX_AGE=-1):
+            self.assertEqual(self.bearer(token).get('/api/reports/').data['detail'], 'Token has expired.')
+        self.assertEqual(self.bearer(token[:-2]).get('/api/reports/').data['detail'], 'Invalid token.')
+        self.assertEqual(self.bearer(token[::-1]).get('/api/reports/').status_code, 403)
+
+    def test_user_cache_needs_a_shared_cache(self):
+        self.assertEqual(check_user_cache(None), [])
+        with override_settings(USER_CACHE_SECONDS=60):
+            self.assertEqual([error.id for error in check_user_cache(None)], ['api.E003'])
+            with tempfile.TemporaryDirectory() as location, override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+            }}):
+                self.assertEqual(check_user_cache(None), [])
+
+
+class InstrumentationTests(ApiTestCase):
+
+    def test_requests_log_at_debug_with_server_timing(self):
+        self.client.force_authenticate(self.manager)
+        with self.assertLogs('api.requests', 'DEBUG') as logs:
+            response = self.client.get('/api/reports/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertEqual([record.levelname for record in logs.records], ['DEBUG'])
+
+    def test_streaming_responses_are_measured_once_sent(self):
+        self.client.force_authenticate(self.supervisor)
+        with mock.patch('api.middleware.observe_request') as observe:
+            response = self.client.get('/api/report-data/export_excel/', {'export_format': 'csv'})
+            self.assertFalse(observe.called)
+            b''.join(response.streaming_content)
+        route, method, status, duration, queries = observe.call_args.args
+        self.assertEqual((route, status), ('reportdata-export-excel', 200))
+        self.assertGreater(queries, 0)
+
+    def test_streaming_responses_log_the_bytes_sent(self):
+        self.client.force_authenticate(self.supervisor)
+        with self.assertLogs('api.requests', 'DEBUG') as logs:
+            response = self.client.get('/api/report-data/export_excel/', {'export_format': 'csv'})
+            body = b''.join(response.streaming_content)
+        self.assertEqual(json.loads(logs.records[0].getMessage())['bytes'], len(body))
+
+
+class MetricsTests(ApiTestCase):
+    URL = '/api/debug/metrics/'
+
+    def test_requires_manager_or_token(self):
+        self.assertEqual(self.client.get(self.URL).status_code, 403)
+        self.client.force_login(self.agent)
+        self.assertEqual(self.client.get(self.URL).status_code, 403)
+        self.client.force_login(self.manager)
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'api_request_duration_seconds', response.content)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_scraper_token(self):
+        self.assertEqual(self.client.get(self.URL, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(self.URL, HTTP_AUTHORIZATION='Bearer scrape-secret').status_code, 200)
@@ -6,6 +6,7 @@ router = DefaultRouter()
 router.register(r'reports', views.ReportViewSet, basename='report')
 router.register(r'report-data', views.ReportDataViewSet, basename='reportdata')
 router.register(r'users', views.UserViewSet, basename='user')
+router.register(r'jobs', views.JobViewSet, basename='job')
 
 urlpatterns = [
     # API router URLs
@@ -22,13 +23,23 @@ urlpatterns = [
     
     # API endpoints 
     path('logout/', views.custom_logout, name='api-logout'),
+    path('token/', views.api_token, name='api-token'),
     path('api/counties/', views.get_counties, name='get_counties'),
     path('api/sublocations/', views.get_sublocations, name='get_sublocations'),   
     path('api/manager-statistics/', views.manager_statistics, name='manager_statistics'),
+    path('api/analytics/', views.report_data_analytics, name='report_data_analytics'),
+
+    # Async read endpoints, for serving dashboards under an ASGI server
+    path('async/counties/', views.async_counties, name='async_counties'),
+    path('async/sublocations/', views.async_sublocations, name='async_sublocations'),
+    path('async/manager-statistics/', views.async_manager_statistics, name='async_manager_statistics'),
+    path('async/reports/', views.async_report_list, name='async_report_list'),
+    path('async/report-data/', views.async_report_data_list, name='async_report_data_list'),
 
 
 
     path('debug/urls/', views.debug_urls, name='debug-urls'),
+    path('debug/metrics/', views.metrics, name='debug-metrics'),
 
 
 ]
\ No newline at end of file
@@ -1,25 +1,54 @@
-from rest_framework import viewsets, generics, status
+from rest_framework import mixins, viewsets, generics, status
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, PermissionDenied
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from django.conf import settings
 from django.contrib.auth import login, logout
 from django.shortcuts import render, redirect
-from django.db.models import Q, Count, Avg
-from django.http import HttpResponse
-import pandas as pd
+from django.db.models import Q, Count, Sum
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import datetime, time, timedelta
+from functools import wraps
+from asgiref.sync import sync_to_async
 import json
+import logging
+import tempfile
 
-from .models import CustomUser, Report, ReportData
+from .models import CustomUser, Job, Report, ReportData, ReportRollup
 # from .models import COUNTY_CHOICES, SUBLOCATION_CHOICES
 
 from .serializers import (
-    LoginSerializer, ReportSerializer, ReportDataSerializer, 
-    UserSerializer, UserCreateSerializer
+    LoginSerializer, ReportSerializer, ReportSummarySerializer, ReportDataSerializer, 
+    ReportDataBulkUpdateSerializer, UserSerializer, UserCreateSerializer, UserProvisionSerializer, JobSerializer
 )
 from .permissions import IsAgent, IsSupervisor, IsManager
+from .exports import XLSX_CONTENT_TYPE, iter_csv, write_xlsx
+from .imports import ImportFileError, SpreadsheetReader, import_format, import_rows
+from .metrics import render_metrics, scrape_allowed
+from .pagination import CreatedAtCursorPagination
+from .provisioning import provision_users
+from .fieldsets import SparseFieldsetViewMixin, parse_sparse_fieldset
+from .caching import acached_response, cached_response
+from .analytics import INTERVALS, report_data_trends
+from .authentication import issue_token
+from .routers import ReplicaReadMixin, aread_from_replica, read_from_replica
+from .sharding import load_report_users, sharded
+from .scoping import scoped_report, scoped_report_data, scoped_reports
+from .search import search_report_data, search_terms
+from .sync import ChangeFeedMixin
 
 
 from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import require_safe
+
+logger = logging.getLogger(__name__)
 
 ########sar###############
 
@@ -31,20 +60,14 @@ def login_page(request):
     Handle both GET (show login page) and POST (process login)
     """
     if request.method == 'GET':
-        print("GET request to login page")
         return render(request, 'login.html')
     
     elif request.method == 'POST':
-        print("POST request to login")
-        print("Request data:", request.data)
-        
         serializer = LoginSerializer(data=request.data)
-        print("Serializer created")
         
         if serializer.is_valid():
-            print("Serializer is valid")
             user = serializer.validated_data['user']
-            print(f"User: {user.username}, Role: {user.role}")
+            logger.info('Login by %s (%s)', user.username, user.role)
             login(request, user)
             
             # Return redirect URL based on user role
@@ -57,11 +80,20 @@ def login_page(request):
             else:
                 return Response({'error': 'Unknown user role'}, status=400)
         else:
-            print("Serializer errors:", serializer.errors)
+            logger.warning('Failed login for %r: %s', request.data.get('username'), serializer.errors)
         
         # If login fails
         return Response(serializer.errors, status=400)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def api_token(request):
+    """Issue a stateless token for XHR calls (``Authorization: Bearer <token>``)"""
+    return Response({
+        'token': issue_token(request.user),
+        'expires_in': getattr(settings, 'API_TOKEN_MAX_AGE', 3600),
+    })
+
 @api_view(['POST'])
 def custom_logout(request):
     logout(request)
@@ -85,14 +117,33 @@ from .models import CustomUser
 
 @api_view(['GET'])
 def get_counties(request):
-    return Response([{"value": v, "label": l} for v, l in CustomUser.COUNTY_CHOICES])
+    return cached_response(
+        request, 'counties',
+        lambda: [{"value": v, "label": l} for v, l in CustomUser.COUNTY_CHOICES],
+        version='static',
+    )
 
 @api_view(['GET'])
 def get_sublocations(request):
-    return Response([{"value": v, "label": l} for v, l in CustomUser.SUBLOCATION_CHOICES])
+    return cached_response(
+        request, 'sublocations',
+        lambda: [{"value": v, "label": l} for v, l in CustomUser.SUBLOCATION_CHOICES],
+        version='static',
+    )
+
+def enqueue_job(request, kind, params):
+    """Queue a background job and answer 202 with where to poll for it"""
+    serializer = JobSerializer(data={'kind': kind, 'params': params}, context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    job = serializer.save(created_by=request.user)
+    data = JobSerializer(job, context={'request': request}).data
+    return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Location': data['url']})
+
+def wants_background(request):
+    return request.query_params.get('background') in ('1', 'true')
 
 # API Viewsets
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsManager]
     
@@ -104,138 +155,322 @@ class UserViewSet(viewsets.ModelViewSet):
             return UserCreateSerializer
         return UserSerializer
     
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """Provision a cohort of agents and supervisors in one request.
+
+        Employee IDs are generated in one batch, passwords are hashed across
+        a process pool and the users are inserted with bulk_create. Users
+        without a username or password get their employee ID for both.
+        """
+        users = request.data.get('users', []) if isinstance(request.data, dict) else request.data
+        serializer = UserProvisionSerializer(data=users, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        created = provision_users(serializer.validated_data)
+        return Response(UserProvisionSerializer(created, many=True).data, status=status.HTTP_201_CREATED)
+    
     @action(detail=False, methods=['get'])
     def agents(self, request):
-        agents = CustomUser.objects.filter(role='agent', is_active=True)
+        agents = self.filter_queryset(CustomUser.objects.filter(role='agent', is_active=True))
         serializer = self.get_serializer(agents, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def supervisors(self, request):
-        supervisors = CustomUser.objects.filter(role='supervisor', is_active=True)
+        supervisors = self.filter_queryset(CustomUser.objects.filter(role='supervisor', is_active=True))
         serializer = self.get_serializer(supervisors, many=True)
         return Response(serializer.data)
 
-class ReportViewSet(viewsets.ModelViewSet):
+class ReportViewSet(ReplicaReadMixin, SparseFieldsetViewMixin, ChangeFeedMixin, viewsets.ModelViewSet):
     serializer_class = ReportSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+    sparse_required_fields = ('created_at', 'updated_at')
+    tombstone_kind = 'report'
 
     def get_queryset(self):
         user = self.request.user
-        if user.role == 'agent':
-            return Report.objects.filter(assigned_to=user)
-        elif user.role == 'supervisor':
-            return Report.objects.filter(county=user.county)
-        elif user.role == 'manager':
-            return Report.objects.all()
-        return Report.objects.none()
+        queryset = load_report_users(Report.objects.all())
+        if self.action in ('list', 'retrieve', 'changes') and self.include_data_rows():
+            queryset = queryset.prefetch_related('data_rows')
+        return scoped_reports(user, queryset)
+    
+    def include_data_rows(self):
+        """Rows are embedded on detail views, and on lists and changes only with ?include=data_rows"""
+        fields, omit = parse_sparse_fieldset(self.request.query_params)
+        if (fields is not None and 'data_rows' not in fields) or (omit is not None and 'data_rows' in omit):
+            return False
+        if self.action not in ('list', 'changes'):
+            return True
+        include = self.request.query_params.get('include', '')
+        return 'data_rows' in include.split(',')
+    
+    def get_serializer_class(self):
+        if not self.include_data_rows():
+            return ReportSummarySerializer
+        return ReportSerializer
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
-class ReportDataViewSet(viewsets.ModelViewSet):
+class ReportDataViewSet(ReplicaReadMixin, SparseFieldsetViewMixin, ChangeFeedMixin, viewsets.ModelViewSet):
     serializer_class = ReportDataSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+    sparse_required_fields = ('created_at', 'updated_at')
+    tombstone_kind = 'reportdata'
 
     def get_queryset(self):
-        user = self.request.user
         report_id = self.request.query_params.get('report_id')
-        queryset = ReportData.objects.all()
+        queryset = scoped_report_data(self.request.user)
         
         if report_id:
             queryset = queryset.filter(report_id=report_id)
-            
-        if user.role == 'agent':
-            return queryset.filter(report__assigned_to=user)
-        elif user.role == 'supervisor':
-            return queryset.filter(report__county=user.county)
-        elif user.role == 'manager':
-            return queryset
-        return ReportData.objects.none()
+        return queryset
     
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
-        """Bulk create report data entries"""
+        """Bulk create report data entries in a single transaction"""
         data_list = request.data.get('entries', [])
         report_id = request.data.get('report_id')
         
+        # Multipart form posts send the entries as a JSON string
+        if isinstance(data_list, str):
+            try:
+                data_list = json.loads(data_list)
+            except ValueError:
+                return Response(
+                    {'error': 'Entries must be a JSON list'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        if not isinstance(data_list, list):
+            return Response(
+                {'error': 'Entries must be a JSON list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if wants_background(request):
+            return enqueue_job(request, 'import', {'report_id': report_id, 'entries': data_list})
+        
         try:
-            report = Report.objects.get(id=report_id)
-            created_entries = []
-            
-            for data in data_list:
-                serializer = self.get_serializer(data=data)
-                if serializer.is_valid():
-                    serializer.save(report=report)
-                    created_entries.append(serializer.data)
-                else:
-                    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
-            return Response(created_entries, status=status.HTTP_201_CREATED)
-            
-        except Report.DoesNotExist:
+            report = scoped_report(request.user, report_id)
+        except (Report.DoesNotExist, TypeError, ValueError):
+            return Response(
+                {'error': 'Report not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        # Validate the whole batch up front so a bad row never leaves half a batch behind
+        context = {**self.get_serializer_context(), 'report': report}
+        serializer = self.get_serializer_class()(data=data_list, many=True, context=context)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer.save(report=report)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Full-text search over customer, location and feedback text.
+
+        ``?q=`` matches parts of words, so partial names and phone numbers
+        work. Results are scoped like the list, best matches first, and
+        capped at ``page_size`` rows.
+        """
+        terms = search_terms(request.query_params.get('q', ''))
+        if terms is None:
+            return Response(
+                {'error': 'Search for at least 3 characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = self.paginator.get_page_size(request)
+        queryset = search_report_data(self.filter_queryset(self.get_queryset()), terms)
+        serializer = self.get_serializer(queryset[:limit], many=True)
+        return Response({'results': serializer.data})
+    
+    @action(detail=False, methods=['post', 'patch'])
+    def bulk_update(self, request):
+        """Apply status and feedback changes to many entries at once.
+
+        Rows are picked by ``ids`` or by a ``filter`` of field values, within
+        what the user may see, and changed with one UPDATE per database. Each
+        affected report's counters are recounted once.
+        """
+        serializer = ReportDataBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        queryset = scoped_report_data(request.user)
+        if 'ids' in serializer.validated_data:
+            queryset = queryset.filter(id__in=serializer.validated_data['ids'])
+        if 'filter' in serializer.validated_data:
+            queryset = queryset.filter(**serializer.validated_data['filter'])
+        
+        updated, report_ids = ReportData.bulk_update_rows(queryset, **serializer.changes)
+        return Response({'updated': updated, 'reports': report_ids})
+    
+    @action(detail=False, methods=['post'])
+    def import_file(self, request):
+        """Import report data rows from an uploaded .xlsx or CSV file.
+
+        The file is read row by row and inserted in bounded chunks. Valid rows
+        are kept; invalid ones come back as per-row errors. With ?background=1
+        the upload is stored and imported by a job instead. Rows can only be
+        imported into a report the user can see.
+        """
+        upload = request.FILES.get('file')
+        report_id = request.data.get('report_id')
+        if upload is None:
+            return Response({'error': 'Attach the spreadsheet as "file"'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            file_format = import_format(upload.name)
+        except ImportFileError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            report = scoped_report(request.user, report_id)
+        except (Report.DoesNotExist, TypeError, ValueError):
             return Response(
                 {'error': 'Report not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        if wants_background(request):
+            path = default_storage.save(f'imports/{upload.name}', upload)
+            return enqueue_job(request, 'import_file', {'report_id': report.id, 'path': path})
+        
+        try:
+            reader = SpreadsheetReader(upload, file_format)
+        except ImportFileError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        summary = import_rows(report, reader)
+        return Response(summary, status=status.HTTP_201_CREATED if summary['created'] else status.HTTP_400_BAD_REQUEST)
     
     @action(detail=False, methods=['get'])
     def export_excel(self, request):
-        """Export report data to Excel"""
+        """Download report data as Excel, or stream it as CSV with ?export_format=csv.
+
+        Only CSV is sent while rows are read. A workbook is a zip archive
+        that cannot be sent until it is complete, so it is built in a
+        temporary file first and large Excel exports can still outlast a
+        proxy timeout; use CSV or ?background=1 for those. With
+        ?background=1 the export runs as a job instead, and the file is
+        downloaded from the job once it has finished.
+        """
         report_id = request.query_params.get('report_id')
+        export_format = request.query_params.get('export_format', 'xlsx')
+        if wants_background(request):
+            return enqueue_job(request, 'export', {'report_id': report_id, 'export_format': export_format})
         queryset = self.get_queryset()
         
         if report_id:
             queryset = queryset.filter(report_id=report_id)
+        # Bind the database now; streaming continues after the view has returned
+        queryset = queryset.using(queryset.db)
         
-        # Convert to DataFrame
-        data = list(queryset.values(
-            'entry_number', 'customer_name', 'customer_phone', 'location',
-            'service_type', 'priority', 'status', 'agent_feedback',
-            'supervisor_feedback', 'created_at'
-        ))
-        
-        df = pd.DataFrame(data)
+        if export_format == 'csv':
+            response = StreamingHttpResponse(iter_csv(queryset), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="report_data.csv"'
+            return response
         
-        # Create HTTP response with Excel file
-        response = HttpResponse(content_type='application/vnd.ms-excel')
-        response['Content-Disposition'] = 'attachment; filename="report_data.xlsx"'
-        
-        df.to_excel(response, index=False, engine='openpyxl')
-        return response
+        # Build the whole workbook on disk, then send the file in chunks
+        workbook_file = tempfile.TemporaryFile()
+        write_xlsx(queryset, workbook_file)
+        workbook_file.seek(0)
+        return FileResponse(
+            workbook_file, as_attachment=True,
+            filename='report_data.xlsx', content_type=XLSX_CONTENT_TYPE
+        )
+
+class JobViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Submit background jobs and poll them; managers see every job"""
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        queryset = Job.objects.all()
+        if self.request.user.role != 'manager':
+            queryset = queryset.filter(created_by=self.request.user)
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        kind = request.data.get('kind')
+        if kind == 'import_file':
+            # File imports name a stored upload, so they only come from the upload endpoint
+            return Response(
+                {'error': 'Upload files to /api/report-data/import_file/?background=1'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return enqueue_job(request, kind, request.data.get('params') or {})
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the file a finished job produced"""
+        job = self.get_object()
+        if not job.result_file:
+            return Response({'error': 'This job has no result file'}, status=status.HTTP_404_NOT_FOUND)
+        content_type = XLSX_CONTENT_TYPE if job.result_file.name.endswith('.xlsx') else 'text/csv'
+        return FileResponse(
+            job.result_file.open('rb'), as_attachment=True,
+            filename=job.result_file.name.rsplit('/', 1)[-1], content_type=content_type
+        )
 
 # Statistics and analytics
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsManager])
+@read_from_replica
 def manager_statistics(request):
     """Get statistics for manager dashboard"""
-    
+    return cached_response(request, 'manager-statistics', _build_manager_statistics)
+
+def _manager_statistics_queries():
+    """The independent queries behind the manager dashboard, not yet run.
+
+    Returns (user count queryset, its aggregates, county rollups, recent
+    reports, recent users) so sync and async views can evaluate them their
+    own way.
+    """
     # User statistics
-    total_agents = CustomUser.objects.filter(role='agent', is_active=True).count()
-    total_supervisors = CustomUser.objects.filter(role='supervisor', is_active=True).count()
-    
-    # Report statistics
-    total_reports = Report.objects.count()
-    completed_reports = Report.objects.filter(status='completed').count()
-    pending_reports = Report.objects.filter(status='pending').count()
+    users = CustomUser.objects.filter(role__in=['agent', 'supervisor'], is_active=True)
+    user_aggregates = {
+        'total_agents': Count('id', filter=Q(role='agent')),
+        'total_supervisors': Count('id', filter=Q(role='supervisor')),
+    }
     
-    # County-wise distribution
-    county_stats = Report.objects.values('county').annotate(
-        total=Count('id'),
-        completed=Count('id', filter=Q(status='completed')),
-        active_rate=Avg('active_rate')
-    )
+    # Report statistics and county-wise distribution, read from the rollups
+    county_rollups = sharded(ReportRollup.objects.all()).values('county').annotate(
+        total=Sum('report_count'),
+        completed=Sum('report_count', filter=Q(status='completed')),
+        pending=Sum('report_count', filter=Q(status='pending')),
+        active_rate_sum=Sum('active_rate_sum'),
+    ).filter(total__gt=0).order_by('county')
     
     # Recent activities
-    recent_reports = Report.objects.order_by('-created_at')[:5]
+    recent_reports = sharded(load_report_users(Report.objects.all())).order_by('-created_at')[:5]
     recent_users = CustomUser.objects.filter(
         role__in=['agent', 'supervisor']
     ).order_by('-date_joined')[:5]
+    return users, user_aggregates, county_rollups, recent_reports, recent_users
+
+def _manager_statistics_payload(user_counts, county_rollups, recent_reports, recent_users):
+    total_reports = completed_reports = pending_reports = 0
+    county_stats = []
+    for row in county_rollups:
+        total_reports += row['total']
+        completed_reports += row['completed'] or 0
+        pending_reports += row['pending'] or 0
+        county_stats.append({
+            'county': row['county'],
+            'total': row['total'],
+            'completed': row['completed'] or 0,
+            'active_rate': row['active_rate_sum'] / row['total'],
+        })
     
-    return Response({
+    return {
         'user_stats': {
-            'total_agents': total_agents,
-            'total_supervisors': total_supervisors,
+            'total_agents': user_counts['total_agents'],
+            'total_supervisors': user_counts['total_supervisors'],
         },
         'report_stats': {
             'total_reports': total_reports,
@@ -243,12 +478,161 @@ def manager_statistics(request):
             'pending_reports': pending_reports,
             'completion_rate': (completed_reports / total_reports * 100) if total_reports > 0 else 0,
         },
-        'county_stats': list(county_stats),
-        'recent_reports': ReportSerializer(recent_reports, many=True).data,
+        'county_stats': county_stats,
+        'recent_reports': ReportSummarySerializer(recent_reports, many=True).data,
         'recent_users': UserSerializer(recent_users, many=True).data,
+    }
+
+def _build_manager_statistics():
+    users, user_aggregates, county_rollups, recent_reports, recent_users = _manager_statistics_queries()
+    return _manager_statistics_payload(
+        users.aggregate(**user_aggregates), county_rollups, recent_reports, recent_users
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@read_from_replica
+def report_data_analytics(request):
+    """Daily or weekly per-county trends over the report data visible to the user"""
+    interval = request.query_params.get('interval', 'day')
+    county = request.query_params.get('county')
+    start = request.query_params.get('start')
+    end = request.query_params.get('end')
+    
+    if interval not in INTERVALS:
+        return Response({'error': f'interval must be one of: {", ".join(INTERVALS)}'}, status=400)
+    if county and county not in dict(CustomUser.COUNTY_CHOICES):
+        return Response({'error': 'Unknown county'}, status=400)
+    try:
+        start_date = parse_date(start) if start else None
+        end_date = parse_date(end) if end else None
+    except ValueError:
+        start_date = end_date = None
+    if (start and start_date is None) or (end and end_date is None):
+        return Response({'error': 'start and end must be YYYY-MM-DD dates'}, status=400)
+    
+    user = request.user
+    queryset = scoped_report_data(user)
+    if county:
+        queryset = queryset.filter(county=county)
+    if start_date:
+        queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(start_date, time.min)))
+    if end_date:
+        next_day = datetime.combine(end_date + timedelta(days=1), time.min)
+        queryset = queryset.filter(created_at__lt=timezone.make_aware(next_day))
+    
+    scope = {'agent': user.pk, 'supervisor': user.county}.get(user.role, 'all')
+    name = f'analytics:{user.role}:{scope}:{interval}:{county or ""}:{start_date or ""}:{end_date or ""}'
+    return cached_response(request, name, lambda: {
+        'interval': interval,
+        'results': report_data_trends(queryset, interval),
     })
 
 
+# Async read endpoints. These are plain Django async views rather than DRF
+# views, so under an ASGI server a slow query parks the request on the event
+# loop instead of holding a worker thread. They authenticate with the same
+# classes as the DRF API: sessions, bearer tokens and basic auth.
+def _api_error(exc, status=None):
+    return JsonResponse({'detail': exc.detail}, status=status or exc.status_code)
+
+def aauthenticate(view_func):
+    """Set ``request.user`` from the API's authentication classes before an async view runs"""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+        drf_request = Request(request, authenticators=authenticators)
+        try:
+            # Authenticators query the database, so they run on the sync thread
+            request.user = await sync_to_async(lambda: drf_request.user)()
+        except AuthenticationFailed as exc:
+            # Answered like DRF: 401 only when the first authenticator names a scheme
+            header = authenticators[0].authenticate_header(drf_request) if authenticators else None
+            response = _api_error(exc, status=401 if header else 403)
+            if header:
+                response['WWW-Authenticate'] = header
+            return response
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+async def async_list(request, viewset_class):
+    """Run a viewset's list action with the async ORM"""
+    if not request.user.is_authenticated:
+        return _api_error(NotAuthenticated(), status=403)
+    drf_request = Request(request)
+    drf_request.user = request.user
+    view = viewset_class(request=drf_request, args=(), kwargs={}, action='list', format_kwarg=None)
+    try:
+        queryset = view.filter_queryset(view.get_queryset())
+        page = await view.paginator.apaginate_queryset(queryset, drf_request, view=view)
+    except APIException as exc:
+        return _api_error(exc)
+    # Serializers may still touch the database for deferred fields
+    data = await sync_to_async(lambda: view.get_serializer(page, many=True).data)()
+    return JsonResponse(view.paginator.get_paginated_data(data), encoder=JSONEncoder)
+
+@require_safe
+@aauthenticate
+@aread_from_replica
+async def async_report_list(request):
+    return await async_list(request, ReportViewSet)
+
+@require_safe
+@aauthenticate
+@aread_from_replica
+async def async_report_data_list(request):
+    return await async_list(request, ReportDataViewSet)
+
+@require_safe
+async def async_counties(request):
+    async def build():
+        return [{"value": v, "label": l} for v, l in CustomUser.COUNTY_CHOICES]
+    return await acached_response(request, 'counties', build, version='static')
+
+@require_safe
+async def async_sublocations(request):
+    async def build():
+        return [{"value": v, "label": l} for v, l in CustomUser.SUBLOCATION_CHOICES]
+    return await acached_response(request, 'sublocations', build, version='static')
+
+@require_safe
+@aauthenticate
+@aread_from_replica
+async def async_manager_statistics(request):
+    """Manager dashboard statistics without holding a worker thread.
+
+    The async ORM runs every query on Django's one sync thread, so the
+    queries still run one after another, as in the sync view.
+    """
+    if not request.user.is_authenticated:
+        return _api_error(NotAuthenticated(), status=403)
+    if request.user.role != 'manager':
+        return _api_error(PermissionDenied())
+    return await acached_response(request, 'manager-statistics', _abuild_manager_statistics)
+
+async def _abuild_manager_statistics():
+    users, user_aggregates, county_rollups, recent_reports, recent_users = _manager_statistics_queries()
+    user_counts = await users.aaggregate(**user_aggregates)
+    county_rollups = await _alist(county_rollups)
+    recent_reports = await _alist(recent_reports)
+    recent_users = await _alist(recent_users)
+    return await sync_to_async(_manager_statistics_payload)(
+        user_counts, county_rollups, recent_reports, recent_users
+    )
+
+
+@require_safe
+def metrics(request):
+    """Prometheus metrics for every worker process, in the text exposition format"""
+    if not scrape_allowed(request):
+        return HttpResponseForbidden()
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def debug_urls(request):
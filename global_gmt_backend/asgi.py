@@ -2,6 +2,10 @@
 ASGI config for global_gmt_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with uvicorn so the async read endpoints under /api/async/ share an
+event loop:
+
+    uvicorn global_gmt_backend.asgi:application --workers 2
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
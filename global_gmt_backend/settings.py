@@ -42,11 +42,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -81,6 +83,129 @@ DATABASES = {
     }
 }
 
+# Production profile for SQLite deployments (DJANGO_DB_PROFILE=production):
+# WAL journaling, tuned pragmas, persistent connections and a serialized writer.
+if os.environ.get('DJANGO_DB_PROFILE') == 'production':
+    DATABASES['default'].update({
+        'ENGINE': 'global_gmt_backend.sqlite_backend',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA busy_timeout=20000;'
+                'PRAGMA cache_size=-65536;'
+                'PRAGMA mmap_size=268435456;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+            'write_retries': 5,
+            'write_backoff': 0.05,
+        },
+    })
+
+
+# Authentication. API calls may use the session, a stateless signed token
+# from /api/token/ (Authorization: Bearer <token>), or basic auth.
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'api.authentication.SignedTokenAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+}
+
+# Seconds an API token stays valid
+API_TOKEN_MAX_AGE = 3600
+
+# Seconds a request user may be served from the per-process user cache (0: off)
+USER_CACHE_SECONDS = 0
+
+# Fast auth profile (DJANGO_AUTH_PROFILE=fast): sessions live in signed
+# cookies and request users come from the per-process cache, so most API
+# calls authenticate without a query. Switching profiles logs everyone out.
+# User changes reach other workers through the default cache, so it must be
+# shared by all of them (see DJANGO_CACHE_DIR); a system check enforces it.
+if os.environ.get('DJANGO_AUTH_PROFILE') == 'fast':
+    SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+    AUTHENTICATION_BACKENDS = ['api.authentication.CachedModelBackend']
+    USER_CACHE_SECONDS = 60
+
+
+# Request instrumentation: every response gets a Server-Timing header and a
+# JSON log line on api.requests; requests over either threshold are logged
+# as warnings with their slowest SQL statement.
+SERVER_TIMING_HEADER = True
+SLOW_REQUEST_MS = 500
+SLOW_REQUEST_QUERIES = 50
+
+# Prometheus metrics are served at /api/debug/metrics/. With several worker
+# processes, point PROMETHEUS_MULTIPROC_DIR at an empty directory they share
+# (cleared on each deploy) so the endpoint reports totals for all of them.
+# Scrapers authenticate with "Authorization: Bearer $DJANGO_METRICS_TOKEN";
+# otherwise only staff and managers signed in to a session can read it.
+METRICS_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN', '')
+
+# Per-request timing lines go to the 'api.requests' logger at DEBUG, so they
+# only show with DJANGO_API_LOG_LEVEL=DEBUG; slow requests are warnings.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api': {'handlers': ['console'], 'level': os.environ.get('DJANGO_API_LOG_LEVEL', 'INFO')},
+    },
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory is per process; with several workers set DJANGO_CACHE_DIR to a
+# directory they share to use the file-based cache instead.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+if os.environ.get('DJANGO_CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['DJANGO_CACHE_DIR'],
+    }
+
+# Seconds a cached API payload may live before it is rebuilt
+API_CACHE_TIMEOUT = 300
+
+
+# Optional read replica (DJANGO_REPLICA_DB=/path/to/replica.sqlite3). Safe
+# dashboard, listing, export and analytics requests read from it, while
+# clients that just wrote stay on the primary for REPLICA_STICKY_SECONDS.
+if os.environ.get('DJANGO_REPLICA_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DJANGO_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Optional county sharding (DJANGO_SHARDS=/data/shard0.sqlite3,/data/shard1.sqlite3).
+# Reports and their data live on the shard of their county; users stay on
+# default. Counties are spread round-robin unless pinned in COUNTY_SHARDS.
+SHARD_DATABASES = []
+for _index, _name in enumerate(filter(None, os.environ.get('DJANGO_SHARDS', '').split(','))):
+    DATABASES[f'shard_{_index}'] = {**DATABASES['default'], 'NAME': _name.strip()}
+    SHARD_DATABASES.append(f'shard_{_index}')
+
+COUNTY_SHARDS = {}
+
+DATABASE_ROUTERS = ['api.routers.CountyShardRouter', 'api.routers.ReadReplicaRouter']
+
+REPLICA_STICKY_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,6 +249,10 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = BASE_DIR / "staticfiles" 
 
+# Uploaded and generated files, such as background job results. Job results
+# are served through /api/jobs/<id>/download/, never directly from here.
+MEDIA_ROOT = BASE_DIR / "media"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -132,6 +261,23 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'api.CustomUser'
 
+# Default page size for the cursor-paginated report and report-data listings
+API_PAGE_SIZE = 50
+
+# Background jobs: threads (or processes) per run_jobs worker, and how often
+# an idle worker polls the queue, in seconds
+JOB_WORKERS = 2
+JOB_POLL_INTERVAL = 1.0
+# Seconds a running job stays claimed without a heartbeat from its worker;
+# after that the worker is taken for dead and another one runs the job again
+JOB_LEASE_SECONDS = 300
+
+# Processes hashing passwords during bulk user provisioning (default: one per CPU)
+PASSWORD_HASH_WORKERS = None
+
+# Days deletions are kept for the delta-sync feed; older sync tokens must resync
+SYNC_TOMBSTONE_DAYS = 30
+
 LOGIN_URL = "/"
 # LOGIN_REDIRECT_URL = '/api/dashboard/'
 LOGOUT_REDIRECT_URL = '/api/login/'
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+SQLite backend that funnels write transactions through one writer per database file.
+
+Every outermost transaction takes the writer lock of its database file before
+it issues BEGIN, so threads of the same worker queue up in Python instead of
+contending for the database lock. Each file (default, every shard) has its
+own lock, so writes to different files never wait on each other. The lock is
+reentrant: a thread that already holds it, say through a second alias on the
+same file, takes it again instead of deadlocking. Contention with other
+processes is absorbed by SQLite's busy timeout, and a BEGIN that still reports
+"database is locked" is retried with bounded exponential backoff.
+
+Statements run in autocommit mode, outside any atomic block, do not take the
+writer lock; they rely on the busy timeout alone.
+
+Extra OPTIONS understood on top of the stock sqlite3 backend:
+
+    write_retries        how many times to retry BEGIN (default 5)
+    write_backoff        first backoff delay in seconds, doubled per retry (default 0.05)
+    writer_lock_timeout  seconds to wait for the in-process writer lock (default 30)
+"""
+import random
+import threading
+import time
+
+from django.db.backends.sqlite3 import base
+from django.db.utils import OperationalError
+
+_writer_locks = {}
+_writer_locks_guard = threading.Lock()
+
+
+def writer_lock(name):
+    """The writer lock of the database file ``name``, shared by every alias using it"""
+    with _writer_locks_guard:
+        return _writer_locks.setdefault(str(name), threading.RLock())
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # The writer lock this connection holds while its transaction is open
+    holds_writer_lock = None
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.write_retries = kwargs.pop('write_retries', 5)
+        self.write_backoff = kwargs.pop('write_backoff', 0.05)
+        self.writer_lock_timeout = kwargs.pop('writer_lock_timeout', 30)
+        return kwargs
+
+    def _start_transaction_under_autocommit(self):
+        lock = writer_lock(self.settings_dict['NAME'])
+        if not lock.acquire(timeout=self.writer_lock_timeout):
+            raise OperationalError('database is locked (timed out waiting for the writer lock)')
+        self.holds_writer_lock = lock
+        try:
+            for attempt in range(self.write_retries + 1):
+                try:
+                    return super()._start_transaction_under_autocommit()
+                except OperationalError as exc:
+                    if 'locked' not in str(exc) or attempt == self.write_retries:
+                        raise
+                    # Jittered exponential backoff so retrying processes spread out
+                    time.sleep(self.write_backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+        except BaseException:
+            self._release_writer_lock()
+            raise
+
+    def _release_writer_lock(self):
+        lock, self.holds_writer_lock = self.holds_writer_lock, None
+        if lock:
+            lock.release()
+
+    def commit(self):
+        try:
+            super().commit()
+        finally:
+            self._release_writer_lock()
+
+    def rollback(self):
+        try:
+            super().rollback()
+        finally:
+            self._release_writer_lock()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._release_writer_lock()